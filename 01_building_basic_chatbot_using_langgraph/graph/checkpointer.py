@@ -0,0 +1,624 @@
+"""Durable SQLite checkpointer with compact, delta-encoded state.
+
+``SQLiteCheckpointer`` is a LangGraph checkpoint saver that keeps every
+thread's checkpoints in one SQLite file (WAL mode), so a conversation continues
+across requests and restarts when it is invoked with the same ``thread_id``::
+
+    graph = graph_builder.compile(checkpointer=sqlite_checkpointer())
+    graph.invoke(inputs, {"configurable": {"thread_id": "user-42"}})
+
+Storage follows LangGraph's own savers: a checkpoint row holds the channel
+versions, and each new channel version is stored once as a blob. On top of that:
+
+- Values are msgpack (LangGraph's serializer), zlib-compressed when that makes
+  them smaller.
+- A list channel such as ``messages`` whose new version starts with its
+  previous version is stored as a delta: the base version, the length of the
+  shared prefix and the new tail. A chat turn writes its new messages instead
+  of a copy of the whole history. Every ``snapshot_interval`` deltas a full
+  copy is written again, which bounds the chain read back on load.
+- Retention: at most ``keep_last`` checkpoints per thread, and threads idle for
+  longer than ``max_age_seconds`` are deleted. Pruning runs every
+  ``prune_interval`` checkpoints, or on demand with ``prune_all()``.
+
+Messages are treated as immutable once they are in the state, as
+``add_messages`` does: an unchanged prefix is recognized by identity or
+equality with the previous version.
+
+``sqlite_checkpointer()`` returns the process-wide instance, configured from:
+
+- ``CHECKPOINT_DB_PATH`` (default ``.checkpoints/chatbot.sqlite`` in the
+  project, ``:memory:`` for a throwaway store)
+- ``CHECKPOINT_KEEP_LAST`` (default 20)
+- ``CHECKPOINT_MAX_AGE_DAYS`` (default unset, threads are kept forever)
+- ``CHECKPOINT_SNAPSHOT_INTERVAL`` (default 100)
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+DEFAULT_CHECKPOINT_PATH = os.getenv(
+    "CHECKPOINT_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".checkpoints", "chatbot.sqlite"),
+)
+
+# Values smaller than this are stored as is; zlib rarely wins on them
+COMPRESS_MIN_BYTES = 256
+_ZLIB_SUFFIX = "+zlib"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    created_at REAL NOT NULL,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE INDEX IF NOT EXISTS checkpoints_created ON checkpoints (created_at);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    base_version TEXT,
+    prefix INTEGER NOT NULL DEFAULT 0,
+    depth INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+# Walks a blob's delta chain back to its full snapshot, newest first
+_CHAIN_QUERY = """
+WITH RECURSIVE chain(version, base_version, prefix, type, value, n) AS (
+    SELECT version, base_version, prefix, type, value, 0 FROM blobs
+    WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?
+    UNION ALL
+    SELECT b.version, b.base_version, b.prefix, b.type, b.value, chain.n + 1 FROM blobs b
+    JOIN chain ON b.thread_id = ? AND b.checkpoint_ns = ? AND b.channel = ? AND b.version = chain.base_version
+)
+SELECT base_version, prefix, type, value FROM chain ORDER BY n DESC
+"""
+
+
+def _shared_prefix(old: list, new: list) -> int:
+    """Length of the common prefix of two lists."""
+    count = 0
+    for a, b in zip(old, new):
+        if a is not b and a != b:
+            break
+        count += 1
+    return count
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """LangGraph checkpoint saver backed by SQLite, with delta-encoded list channels."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CHECKPOINT_PATH,
+        keep_last: Optional[int] = 20,
+        max_age_seconds: Optional[float] = None,
+        snapshot_interval: int = 100,
+        prune_interval: int = 100,
+        max_cached_threads: int = 1024,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        """Initialize the checkpointer.
+
+        Args:
+            path: SQLite file, or ``":memory:"``.
+            keep_last: Checkpoints kept per thread (and namespace). ``None`` keeps all.
+            max_age_seconds: Threads without a new checkpoint for this long are
+                deleted. ``None`` keeps them forever.
+            snapshot_interval: Deltas in a row before a list channel is stored in full
+                again. 0 stores every version in full.
+            prune_interval: Checkpoints written between automatic pruning passes.
+            max_cached_threads: Threads whose latest list values are kept in memory
+                to compute deltas without reading them back.
+            serde: Serializer, LangGraph's msgpack serializer by default.
+        """
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep_last = keep_last
+        self.max_age_seconds = max_age_seconds
+        self.snapshot_interval = snapshot_interval
+        self.prune_interval = prune_interval
+        self.max_cached_threads = max_cached_threads
+
+        self._lock = threading.RLock()
+        self._puts = 0
+        self._touched: set[str] = set()
+        # (thread_id, checkpoint_ns, channel) -> (version, list value, depth) of the last list stored
+        self._latest: OrderedDict[tuple[str, str, str], tuple[str, list, int]] = OrderedDict()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # -- encoding ---------------------------------------------------------
+
+    def _dump(self, value: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) >= COMPRESS_MIN_BYTES:
+            packed = zlib.compress(data)
+            if len(packed) < len(data):
+                return type_ + _ZLIB_SUFFIX, packed
+        return type_, data
+
+    def _load(self, type_: str, data: bytes) -> Any:
+        if type_.endswith(_ZLIB_SUFFIX):
+            type_, data = type_[: -len(_ZLIB_SUFFIX)], zlib.decompress(data)
+        return self.serde.loads_typed((type_, data))
+
+    # -- channel values ---------------------------------------------------
+
+    def _remember(self, key: tuple[str, str, str], version: str, value: list, depth: int) -> None:
+        self._latest[key] = (version, list(value), depth)
+        self._latest.move_to_end(key)
+        while len(self._latest) > self.max_cached_threads:
+            self._latest.popitem(last=False)
+
+    def _load_value(self, thread_id: str, checkpoint_ns: str, channel: str, version: str) -> tuple[bool, Any]:
+        """Rebuild one channel version from its delta chain. Returns (found, value)."""
+        rows = self._conn.execute(
+            _CHAIN_QUERY, (thread_id, checkpoint_ns, channel, version, thread_id, checkpoint_ns, channel)
+        ).fetchall()
+        if not rows or rows[0][2] == "empty" or rows[0][0] is not None:
+            # Missing, empty, or a chain whose snapshot was lost
+            return False, None
+        value = self._load(rows[0][2], rows[0][3])
+        for _, prefix, type_, data in rows[1:]:
+            value = value[:prefix] + self._load(type_, data)
+        return True, value
+
+    def _load_values(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            found, value = self._load_value(thread_id, checkpoint_ns, channel, str(version))
+            if found:
+                values[channel] = value
+        return values
+
+    def _previous_list(
+        self, thread_id: str, checkpoint_ns: str, channel: str, parent_id: Optional[str]
+    ) -> Optional[tuple[str, list, int]]:
+        """The list this channel held before this checkpoint, as (version, value, depth)."""
+        key = (thread_id, checkpoint_ns, channel)
+        if key in self._latest:
+            return self._latest[key]
+        if parent_id is None:
+            return None
+        # Not in memory (e.g. after a restart): read the parent's version back once
+        row = self._conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, parent_id),
+        ).fetchone()
+        if row is None:
+            return None
+        version = self._load(*row)["channel_versions"].get(channel)
+        if version is None:
+            return None
+        found, value = self._load_value(thread_id, checkpoint_ns, channel, str(version))
+        if not found or not isinstance(value, list):
+            return None
+        (depth,) = self._conn.execute(
+            "SELECT depth FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+            (thread_id, checkpoint_ns, channel, str(version)),
+        ).fetchone()
+        return str(version), value, depth
+
+    def _put_blob(
+        self, thread_id: str, checkpoint_ns: str, channel: str, version: str, values: dict, parent_id: Optional[str]
+    ) -> None:
+        base_version, prefix, depth = None, 0, 0
+        if channel not in values:
+            type_, data = "empty", b""
+        else:
+            value = values[channel]
+            stored = value
+            if isinstance(value, list):
+                previous = self._previous_list(thread_id, checkpoint_ns, channel, parent_id)
+                if previous is not None and previous[2] < self.snapshot_interval:
+                    shared = _shared_prefix(previous[1], value)
+                    if shared:
+                        base_version, prefix, depth = previous[0], shared, previous[2] + 1
+                        stored = value[shared:]
+                self._remember((thread_id, checkpoint_ns, channel), version, value, depth)
+            type_, data = self._dump(stored)
+
+        self._conn.execute(
+            """INSERT OR REPLACE INTO blobs
+               (thread_id, checkpoint_ns, channel, version, type, value, base_version, prefix, depth)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (thread_id, checkpoint_ns, channel, version, type_, data, base_version, prefix, depth),
+        )
+
+    # -- reading ----------------------------------------------------------
+
+    def _writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list[tuple[str, str, Any]]:
+        rows = self._conn.execute(
+            """SELECT task_id, channel, type, value FROM writes
+               WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+               ORDER BY task_path, task_id, idx""",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return [(task_id, channel, self._load(type_, value)) for task_id, channel, type_, value in rows]
+
+    def _tuple(self, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, data, metadata_type, metadata = row
+        checkpoint = self._load(type_, data)
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_values(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+            },
+            metadata=self._load(metadata_type, metadata),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=self._writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    _COLUMNS = "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Return the checkpoint of ``config``, or the thread's latest without a ``checkpoint_id``."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    f"""SELECT {self._COLUMNS} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                        ORDER BY checkpoint_id DESC LIMIT 1""",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._tuple(row) if row is not None else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first, optionally filtered by thread, metadata and position."""
+        query = f"SELECT {self._COLUMNS} FROM checkpoints"
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            results = []
+            for row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                if filter:
+                    metadata = self._load(row[6], row[7])
+                    if not all(metadata.get(key) == value for key, value in filter.items()):
+                        continue
+                results.append(self._tuple(row))
+        yield from results
+
+    # -- writing ----------------------------------------------------------
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint and the channel versions that changed in it."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        type_, data = self._dump(stored)
+        metadata_type, metadata_data = self._dump(get_checkpoint_metadata(config, metadata))
+
+        with self._lock:
+            for channel, version in new_versions.items():
+                self._put_blob(thread_id, checkpoint_ns, channel, str(version), values, parent_id)
+            self._conn.execute(
+                """INSERT OR REPLACE INTO checkpoints
+                   (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, created_at,
+                    type, checkpoint, metadata_type, metadata)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (thread_id, checkpoint_ns, checkpoint["id"], parent_id, time.time(),
+                 type_, data, metadata_type, metadata_data),
+            )
+            self._conn.commit()
+
+            self._touched.add(thread_id)
+            self._puts += 1
+            if self.prune_interval and self._puts % self.prune_interval == 0:
+                self._prune_pass()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store the pending writes of a task."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = self._dump(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, task_path,
+                         WRITES_IDX_MAP.get(channel, idx), channel, type_, data))
+
+        # Regular writes are stored once; special ones (errors, interrupts) replace the last
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self._lock:
+            self._conn.executemany(
+                f"""{verb} INTO writes
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, task_path, idx, channel, type, value)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
+            self._conn.commit()
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Same scheme as InMemorySaver: a zero-padded counter that sorts as text, plus a random tiebreaker
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # -- retention --------------------------------------------------------
+
+    def _forget(self, thread_id: str) -> None:
+        for key in [key for key in self._latest if key[0] == thread_id]:
+            del self._latest[key]
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint, write and value of a thread."""
+        with self._lock:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+            self._forget(thread_id)
+            self._touched.discard(thread_id)
+
+    def _trim_thread(self, thread_id: str, keep_last: int) -> None:
+        """Keep the newest ``keep_last`` checkpoints of each namespace and the values they use."""
+        namespaces = [
+            ns for (ns,) in self._conn.execute(
+                "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+            )
+        ]
+        for checkpoint_ns in namespaces:
+            rows = self._conn.execute(
+                """SELECT checkpoint_id, type, checkpoint FROM checkpoints
+                   WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC""",
+                (thread_id, checkpoint_ns),
+            ).fetchall()
+            kept, dropped = rows[:keep_last], rows[keep_last:]
+            if not dropped:
+                continue
+
+            needed = set()
+            for _, type_, data in kept:
+                needed.update((channel, str(version)) for channel, version in self._load(type_, data)["channel_versions"].items())
+
+            # Deltas whose base is about to go are rewritten in full first
+            blobs = self._conn.execute(
+                "SELECT channel, version, base_version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            ).fetchall()
+            for channel, version, base_version in blobs:
+                if (channel, version) in needed and base_version is not None and (channel, base_version) not in needed:
+                    found, value = self._load_value(thread_id, checkpoint_ns, channel, version)
+                    if found:
+                        type_, data = self._dump(value)
+                        self._conn.execute(
+                            """UPDATE blobs SET type = ?, value = ?, base_version = NULL, prefix = 0, depth = 0
+                               WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?""",
+                            (type_, data, thread_id, checkpoint_ns, channel, version),
+                        )
+
+            self._conn.executemany(
+                "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                [(thread_id, checkpoint_ns, channel, version) for channel, version, _ in blobs if (channel, version) not in needed],
+            )
+            dropped_ids = [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id, _, _ in dropped]
+            for table in ("checkpoints", "writes"):
+                self._conn.executemany(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", dropped_ids
+                )
+        # Cached lists may now point at deleted versions
+        self._forget(thread_id)
+
+    def _prune_pass(self) -> None:
+        if self.max_age_seconds is not None:
+            expired = self._conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) < ?",
+                (time.time() - self.max_age_seconds,),
+            ).fetchall()
+            for (thread_id,) in expired:
+                self.delete_thread(thread_id)
+        if self.keep_last is not None:
+            for thread_id in self._touched:
+                self._trim_thread(thread_id, self.keep_last)
+        self._touched.clear()
+        self._conn.commit()
+
+    def prune_all(self) -> None:
+        """Apply the retention settings to every thread now."""
+        with self._lock:
+            self._touched.update(thread_id for (thread_id,) in self._conn.execute("SELECT DISTINCT thread_id FROM checkpoints"))
+            self._prune_pass()
+
+    def prune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        """Keep only the latest checkpoint of each thread (``keep_latest``), or delete the threads (``delete``)."""
+        with self._lock:
+            for thread_id in thread_ids:
+                if strategy == "delete":
+                    self.delete_thread(thread_id)
+                elif strategy == "keep_latest":
+                    self._trim_thread(thread_id, 1)
+                else:
+                    raise ValueError(f"Unknown prune strategy: {strategy}")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+    # -- async ------------------------------------------------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def aprune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        await asyncio.to_thread(self.prune, thread_ids, strategy=strategy)
+
+
+_checkpointer: Optional[SQLiteCheckpointer] = None
+_checkpointer_lock = threading.Lock()
+
+
+def sqlite_checkpointer(**kwargs: Any) -> SQLiteCheckpointer:
+    """Return the process-wide checkpointer, creating it on first use.
+
+    Args:
+        **kwargs: ``SQLiteCheckpointer`` options, used only on creation. Unset
+            ones come from the ``CHECKPOINT_*`` environment variables.
+    """
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            kwargs.setdefault("keep_last", int(os.getenv("CHECKPOINT_KEEP_LAST", "20")))
+            kwargs.setdefault("snapshot_interval", int(os.getenv("CHECKPOINT_SNAPSHOT_INTERVAL", "100")))
+            if os.getenv("CHECKPOINT_MAX_AGE_DAYS"):
+                kwargs.setdefault("max_age_seconds", float(os.environ["CHECKPOINT_MAX_AGE_DAYS"]) * 86400)
+            _checkpointer = SQLiteCheckpointer(**kwargs)
+        return _checkpointer
@@ -1,10 +1,14 @@
-from langchain.chat_models import init_chat_model
-from typing import TypedDict, Annotated
+import functools
+from graph.models import get_chat_model
+from graph.instrumentation import instrument
+from graph.checkpointer import sqlite_checkpointer
+from typing import TypedDict, Annotated, Optional
 from langchain_core.messages import AnyMessage
 from langgraph.graph.message import add_messages
 from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
-llm =  init_chat_model("openai:gpt-4o-mini")
+llm =  get_chat_model("openai:gpt-4o-mini")
 
 llm = llm.bind_tools([])
 
@@ -39,15 +43,34 @@ def chatbot(state: AgentState)-> AgentState:
 
 
 #Compile the graph
+def build_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """Compile the chatbot graph.
+    
+    Pass a checkpointer, e.g. ``sqlite_checkpointer()``, to continue conversations
+    across invocations with the same ``configurable.thread_id``.
+    """
+    
+    graph_builder = StateGraph(AgentState)
+    
+    #add nodes
+    graph_builder.add_node("chatbot", chatbot)
+    
+    #add edges
+    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_edge("chatbot", END)
+    
+    return graph_builder.compile(checkpointer=checkpointer)
 
-graph_builder = StateGraph(AgentState)
 
-#add nodes
-graph_builder.add_node("chatbot", chatbot)
+#The graph served by langgraph.json; the API server brings its own persistence
+graph = instrument(build_graph(), "basic_chatbot")
 
-#add edges
-graph_builder.add_edge(START, "chatbot")
-graph_builder.add_edge("chatbot", END)
 
-#compile the graph
-graph = graph_builder.compile()
\ No newline at end of file
+@functools.cache
+def persistent_graph():
+    """The chatbot graph with conversations persisted in SQLite, for running it directly.
+    
+    Every invocation needs ``config={"configurable": {"thread_id": ...}}``.
+    """
+    
+    return instrument(build_graph(checkpointer=sqlite_checkpointer()), "basic_chatbot_persistent")
@@ -0,0 +1,155 @@
+"""Shared chat model registry.
+
+Graph modules ask this registry for their chat model instead of calling
+``init_chat_model`` themselves, so every graph served from the same process
+reuses one model instance per (model, config) and one pooled keep-alive HTTP
+client instead of opening its own connection pool.
+
+Pool limits can be tuned through environment variables:
+
+- ``LLM_HTTP_MAX_CONNECTIONS`` (default 100)
+- ``LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS`` (default 20)
+- ``LLM_HTTP_KEEPALIVE_EXPIRY`` seconds (default 30)
+- ``LLM_HTTP_TIMEOUT`` seconds (default 60)
+
+Copied into every LangGraph project, which are deployed on their own. Edit
+this copy (``03_workflow_and_agent/graph``) and run
+``scripts/sync_shared_modules.py`` to update the others.
+"""
+import json
+import os
+import threading
+from typing import Any, Callable, Optional
+
+import httpx
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models import BaseChatModel
+
+DEFAULT_MODEL = "openai:gpt-4o-mini"
+
+# Model name prefixes that init_chat_model resolves to the OpenAI provider
+_OPENAI_PREFIXES = ("gpt-", "o1", "o3", "o4", "chatgpt")
+
+_lock = threading.Lock()
+_models: dict[str, BaseChatModel] = {}
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+_model_factory: Callable[..., BaseChatModel] = init_chat_model
+
+
+def _pool_limits() -> httpx.Limits:
+    """Read the connection pool limits from the environment."""
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(float(os.getenv("LLM_HTTP_TIMEOUT", "60")))
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide sync HTTP client, creating it on first use."""
+    global _http_client
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(limits=_pool_limits(), timeout=_timeout())
+        return _http_client
+
+
+def get_http_async_client() -> httpx.AsyncClient:
+    """Return the process-wide async HTTP client, creating it on first use."""
+    global _http_async_client
+    with _lock:
+        if _http_async_client is None or _http_async_client.is_closed:
+            _http_async_client = httpx.AsyncClient(limits=_pool_limits(), timeout=_timeout())
+        return _http_async_client
+
+
+def _is_openai(model: str, model_provider: Optional[str]) -> bool:
+    """Check whether init_chat_model will build an OpenAI chat model."""
+    if model_provider:
+        return model_provider == "openai"
+    if ":" in model:
+        return model.split(":", 1)[0] == "openai"
+    return model.startswith(_OPENAI_PREFIXES)
+
+
+def _registry_key(model: str, kwargs: dict[str, Any]) -> str:
+    # Objects such as caches or callbacks are keyed by identity
+    return json.dumps(
+        {"model": model, **kwargs},
+        sort_keys=True,
+        default=lambda value: f"{type(value).__name__}@{id(value)}",
+    )
+
+
+def get_chat_model(model: str = DEFAULT_MODEL, **kwargs: Any) -> BaseChatModel:
+    """Return the shared chat model for ``model`` and ``kwargs``.
+
+    The model is created on the first request for a given configuration and
+    reused afterwards. OpenAI models are wired to the shared pooled HTTP
+    clients unless the caller passes its own.
+
+    Args:
+        model: Model name, in any form accepted by ``init_chat_model``.
+        **kwargs: Extra model configuration such as ``temperature``.
+
+    Returns:
+        The shared chat model instance.
+    """
+    key = _registry_key(model, kwargs)
+
+    chat_model = _models.get(key)
+    if chat_model is not None:
+        return chat_model
+
+    init_kwargs = dict(kwargs)
+    if _model_factory is init_chat_model and _is_openai(model, kwargs.get("model_provider")):
+        init_kwargs.setdefault("http_client", get_http_client())
+        init_kwargs.setdefault("http_async_client", get_http_async_client())
+
+    with _lock:
+        # Another thread may have built it while we were preparing the clients
+        chat_model = _models.get(key)
+        if chat_model is None:
+            chat_model = _model_factory(model, **init_kwargs)
+            _models[key] = chat_model
+        return chat_model
+
+
+def set_model_factory(factory: Optional[Callable[..., BaseChatModel]] = None) -> None:
+    """Replace the function used to build chat models.
+
+    Passing ``None`` restores ``init_chat_model``. Already built models are
+    dropped so the next request goes through the new factory.
+
+    Args:
+        factory: Callable with the ``init_chat_model(model, **kwargs)`` signature.
+    """
+    global _model_factory
+    with _lock:
+        _model_factory = factory or init_chat_model
+        _models.clear()
+
+
+def close() -> None:
+    """Drop all shared models and close the sync HTTP client."""
+    global _http_client
+    with _lock:
+        _models.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+async def aclose() -> None:
+    """Drop all shared models and close both HTTP clients."""
+    global _http_async_client
+    close()
+    with _lock:
+        client, _http_async_client = _http_async_client, None
+    if client is not None:
+        await client.aclose()
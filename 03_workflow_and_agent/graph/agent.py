@@ -1,12 +1,38 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, wait
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import MessagesState
 from pydantic import BaseModel, Field
-from typing import TypedDict, Literal
-from langchain.chat_models import init_chat_model
+from typing import TypedDict, Literal, Optional
+from graph.models import get_chat_model
+from graph.instrumentation import instrument
 from langchain_core.tools import tool
 from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 
-llm = init_chat_model("openai:gpt-4o-mini")
+llm = get_chat_model("openai:gpt-4o-mini")
+
+# Per-call timeout for tool execution, in seconds
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "30"))
+
+# Workers for running tool calls, plus room for timed out calls that are still running.
+# A thread can't be interrupted: a timed out sync tool keeps its worker until it returns.
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "16"))
+TOOL_MAX_ABANDONED = int(os.getenv("TOOL_MAX_ABANDONED", "16"))
+
+# Shared pool that runs independent sync tool calls side by side.
+# ContextThreadPoolExecutor carries the run context (callbacks, tracing) into the worker threads.
+tool_executor = ContextThreadPoolExecutor(
+    max_workers=TOOL_MAX_WORKERS + TOOL_MAX_ABANDONED,
+    thread_name_prefix="tool_node",
+)
+
+# Timed out tool calls still holding a worker
+_abandoned = 0
+_abandoned_lock = threading.Lock()
 
 
 # Define the state
@@ -61,40 +87,155 @@ tools = [get_product_price, get_weather_info, multiply, divide, add]
 
 tools_by_name = {tool.name: tool for tool in tools}
 
-llm_with_tools = llm.bind_tools(tools, parallel_tool_calls=False)
+llm_with_tools = llm.bind_tools(tools, parallel_tool_calls=True)
 
 
-def llm_call(state: AgentState):
-    """LLM call"""
+def llm_call_messages(state: AgentState) -> list:
+    """Build the prompt for the LLM call"""
     
     messages = state['messages']
     
     system_instruction = """You are a helpful assistant tasked with performing arithmetic on a set of inputs."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction}
     ] + messages
+
+
+def llm_call(state: AgentState):
+    """LLM call"""
     
-    response = llm_with_tools.invoke(messages)
+    response = llm_with_tools.invoke(llm_call_messages(state))
     
     return {"messages": [response]}
 
 
+async def allm_call(state: AgentState):
+    """LLM call (async)"""
+    
+    response = await llm_with_tools.ainvoke(llm_call_messages(state))
+    
+    return {"messages": [response]}
+
+
+def tool_timeout_message(tool_call: dict) -> ToolMessage:
+    """Tool message returned when a tool call exceeds its timeout"""
+    
+    return ToolMessage(
+        content=f"Error: {tool_call['name']} timed out after {TOOL_TIMEOUT_SECONDS}s",
+        tool_call_id=tool_call['id'],
+        status="error",
+    )
+
+
+def tool_busy_message(tool_call: dict) -> ToolMessage:
+    """Tool message returned when timed out calls have used up the spare workers"""
+    
+    return ToolMessage(
+        content=f"Error: {tool_call['name']} was not run, too many earlier tool calls are stuck",
+        tool_call_id=tool_call['id'],
+        status="error",
+    )
+
+
+def submit_tool_call(tool_call: dict) -> Optional[Future]:
+    """Start a sync tool call on the pool, or return None while it is full of abandoned calls"""
+    
+    # Past this point new calls would queue behind stuck ones and time out too
+    with _abandoned_lock:
+        if _abandoned >= TOOL_MAX_ABANDONED:
+            return None
+    
+    return tool_executor.submit(tools_by_name[tool_call['name']].invoke, tool_call['args'])
+
+
+def _release_worker(future: Future) -> None:
+    global _abandoned
+    with _abandoned_lock:
+        _abandoned -= 1
+
+
+def abandon_tool_call(future: Future) -> None:
+    """Give up on a timed out call, which keeps its worker until the tool returns"""
+    global _abandoned
+    
+    # A call that never started is simply dropped
+    if future.cancel():
+        return
+    
+    with _abandoned_lock:
+        _abandoned += 1
+    
+    future.add_done_callback(_release_worker)
+
+
 def tool_node(state: AgentState):
     """Tool node"""
     
+    tool_calls = state['messages'][-1].tool_calls
+    
+    # Submit every call at once so their latencies overlap instead of adding up
+    futures = [submit_tool_call(tool_call) for tool_call in tool_calls]
+    
+    wait([future for future in futures if future is not None], timeout=TOOL_TIMEOUT_SECONDS)
+    
+    # Build the results in tool call order, not completion order
     result = []
     
-    for tool_call in state['messages'][-1].tool_calls:
-        tool = tools_by_name[tool_call['name']]
+    for tool_call, future in zip(tool_calls, futures):
+        if future is None:
+            result.append(tool_busy_message(tool_call))
+            continue
+        
+        if not future.done():
+            abandon_tool_call(future)
+            result.append(tool_timeout_message(tool_call))
+            continue
         
-        observation = tool.invoke(tool_call['args'])
+        observation = future.result()
         
         result.append(ToolMessage(content=observation, tool_call_id=tool_call['id']))
         
     return {"messages": result}
 
 
+async def atool_node(state: AgentState):
+    """Tool node (async)"""
+    
+    tool_calls = state['messages'][-1].tool_calls
+    
+    async def run_tool(tool_call: dict) -> ToolMessage:
+        tool = tools_by_name[tool_call['name']]
+        
+        # Native async tools are cancelled on timeout
+        if getattr(tool, "coroutine", None) is not None:
+            try:
+                observation = await asyncio.wait_for(tool.ainvoke(tool_call['args']), TOOL_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                return tool_timeout_message(tool_call)
+            
+            return ToolMessage(content=observation, tool_call_id=tool_call['id'])
+        
+        # Sync tools share the pool, and its accounting of stuck calls, with tool_node
+        future = submit_tool_call(tool_call)
+        
+        if future is None:
+            return tool_busy_message(tool_call)
+        
+        try:
+            observation = await asyncio.wait_for(asyncio.wrap_future(future), TOOL_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            abandon_tool_call(future)
+            return tool_timeout_message(tool_call)
+        
+        return ToolMessage(content=observation, tool_call_id=tool_call['id'])
+    
+    # gather keeps the results in tool call order
+    result = await asyncio.gather(*(run_tool(tool_call) for tool_call in tool_calls))
+    
+    return {"messages": list(result)}
+
+
 def should_continue(state: AgentState)->Literal["tool_node", END]:
     """Should continue"""
     
@@ -110,14 +251,14 @@ def should_continue(state: AgentState)->Literal["tool_node", END]:
         
 agent_builder = StateGraph(AgentState)
 
-agent_builder.add_node("llm_call", llm_call)
-agent_builder.add_node("tool_node", tool_node)
+agent_builder.add_node("llm_call", RunnableLambda(llm_call, afunc=allm_call))
+agent_builder.add_node("tool_node", RunnableLambda(tool_node, afunc=atool_node))
 
 agent_builder.add_edge(START, "llm_call")
 agent_builder.add_conditional_edges("llm_call", should_continue, {"tool_node": "tool_node", END: END})
 agent_builder.add_edge("tool_node", "llm_call")
 
-graph = agent_builder.compile()
+graph = instrument(agent_builder.compile(), "agent")
 
 
         
@@ -0,0 +1,231 @@
+"""Exact-match response cache for chat models.
+
+``ResponseCache`` plugs into LangChain's ``cache=`` model option, so it sits
+under ``llm.invoke``/``llm.ainvoke`` (including ``with_structured_output`` and
+``bind_tools`` wrappers). Entries are keyed by the serialized messages plus the
+model parameters, kept in an in-memory LRU and persisted in SQLite.
+
+A graph opts in by asking the registry for a cached model::
+
+    llm = get_chat_model("gpt-4o-mini", temperature=0, cache=response_cache("agent"))
+
+Copied into every LangGraph project, which are deployed on their own. Edit
+this copy (``03_workflow_and_agent/graph``) and run
+``scripts/sync_shared_modules.py`` to update the others.
+"""
+import copy
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "LLM_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"),
+)
+
+_caches: dict[str, "ResponseCache"] = {}
+_caches_lock = threading.Lock()
+
+
+class ResponseCache(BaseCache):
+    """Two-tier (memory LRU + SQLite) exact-match LLM response cache."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_memory_entries: int = 1024,
+        max_disk_entries: int = 100_000,
+        ttl_seconds: Optional[float] = None,
+        prune_interval: int = 100,
+    ):
+        """Initialize the cache.
+
+        Args:
+            path: SQLite file for the persistent tier. ``None`` keeps the cache in memory only.
+            max_memory_entries: Size of the in-memory LRU tier.
+            max_disk_entries: Maximum number of rows kept in SQLite.
+            ttl_seconds: Entries older than this are treated as misses. ``None`` disables expiry.
+            prune_interval: Number of writes between SQLite size/TTL pruning passes.
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.prune_interval = prune_interval
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, tuple[float, RETURN_VAL_TYPE]] = OrderedDict()
+        self._writes = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+            self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        # prompt is the serialized message list, llm_string the sorted model params
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, created_at: float, value: RETURN_VAL_TYPE) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    @staticmethod
+    def _hit(value: RETURN_VAL_TYPE) -> RETURN_VAL_TYPE:
+        """Copy a cached response, marking each generation as served from the cache.
+
+        The mark (``generation_info["cache_hit"]``) lets instrumentation tell
+        cached answers from model calls.
+        """
+        value = copy.deepcopy(value)
+        for generation in value:
+            generation.generation_info = {**(generation.generation_info or {}), "cache_hit": True}
+        return value
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Look up a cached response."""
+        key = self._key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    # Callers may annotate the returned messages, so hand out copies
+                    return self._hit(value)
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    created_at = row[1]
+                    if not self._expired(created_at, now):
+                        value = loads(row[0])
+                        self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._conn.commit()
+                        self._remember(key, created_at, value)
+                        self._stats["disk_hits"] += 1
+                        return self._hit(value)
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self._stats["expired"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store a response."""
+        key = self._key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, now, copy.deepcopy(return_val))
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, dumps(return_val), now, now),
+                )
+                self._conn.commit()
+                self._writes += 1
+                if self._writes % self.prune_interval == 0:
+                    self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Drop expired rows and trim SQLite to ``max_disk_entries``."""
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._stats["expired"] += cursor.rowcount
+
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self._stats["evictions"] += overflow
+        self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and the current tier sizes."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["memory_entries"] = len(self._memory)
+            if self._conn is not None:
+                stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            return stats
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def response_cache(name: str, **kwargs: Any) -> ResponseCache:
+    """Return the shared cache called ``name``, creating it on first use.
+
+    The SQLite file lives in ``LLM_CACHE_DIR`` (``.cache/`` in the project by
+    default). Setting ``LLM_CACHE_MEMORY_ONLY=1`` skips the SQLite tier.
+
+    Args:
+        name: Cache name, usually the graph name.
+        **kwargs: Extra ``ResponseCache`` options, used only on creation.
+
+    Returns:
+        The shared cache instance.
+    """
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            if "path" not in kwargs and os.getenv("LLM_CACHE_MEMORY_ONLY") != "1":
+                kwargs["path"] = os.path.join(DEFAULT_CACHE_DIR, f"{name}.sqlite")
+            cache = ResponseCache(**kwargs)
+            _caches[name] = cache
+        return cache
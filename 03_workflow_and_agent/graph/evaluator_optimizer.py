@@ -1,11 +1,24 @@
+import asyncio
+import os
+import time
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import MessagesState
 from pydantic import BaseModel, Field
-from typing import TypedDict, Literal
-from langchain.chat_models import init_chat_model
+from typing import TypedDict, Literal, Optional
+from graph.models import get_chat_model
+from graph.instrumentation import instrument
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
 
-llm = init_chat_model("openai:gpt-4o-mini")
+llm = get_chat_model("openai:gpt-4o-mini")
+
+# Default budgets for the generate/evaluate loop. Override per run with
+# config={"configurable": {"max_iterations": 3, "max_seconds": 30, "max_tokens": 10000}}.
+DEFAULT_BUDGETS = {
+    "max_iterations": int(os.getenv("EMAIL_MAX_ITERATIONS", "5")),
+    "max_seconds": float(os.getenv("EMAIL_MAX_SECONDS", "60")),
+    "max_tokens": int(os.getenv("EMAIL_MAX_TOKENS", "20000")),
+}
 
 
 # Define the state
@@ -16,6 +29,14 @@ class AgentState(TypedDict):
     final_reply: str
     quality: Literal["pass", "fail"]
     feedback: str
+    score: int
+    best_reply: str
+    best_score: int
+    iterations: int
+    tokens_used: int
+    started_at: float
+    stop_reason: str
+    stats: dict
 
 
 # Define the AnalyzedInput class
@@ -30,13 +51,25 @@ class EmailReplyFeedback(BaseModel):
             "Ensure feedback focuses on tone, completeness, and clarity."
         )
     )
+    score: int = Field(
+        description="Overall quality of the reply from 1 (unusable) to 10 (ready to send)."
+    )
 
     
-evaluator_llm = llm.with_structured_output(EmailReplyFeedback)
+# include_raw keeps the raw message so its token usage can be counted
+evaluator_llm = llm.with_structured_output(EmailReplyFeedback, include_raw=True)
 
-#Generate email node
-def generate_reply_email(state: AgentState):
-    """Generate an email reply"""
+
+def used_tokens(message) -> int:
+    """Total tokens reported for a model response"""
+    
+    usage = getattr(message, "usage_metadata", None) or {}
+    
+    return usage.get("total_tokens", 0)
+
+#Generate email prompt
+def generate_reply_messages(state: AgentState) -> list[dict]:
+    """Build the prompt for generating an email reply"""
     
     customer_email = state['customer_email']
     
@@ -48,17 +81,86 @@ def generate_reply_email(state: AgentState):
         feedback = ""
     
     system_instruction = """You are a helpful assistant that can a very simple email reply."""
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": f"Here is the customer email {customer_email}. {feedback}"}
     ]
-    response = llm.invoke(messages)
+
+
+def run_budgets(config: Optional[RunnableConfig]) -> dict:
+    """Budgets for this run: the defaults, overridden by the run's configurable"""
     
-    return {"draft_reply": response.content}
+    configurable = (config or {}).get("configurable", {})
+    
+    return {name: configurable.get(name, default) for name, default in DEFAULT_BUDGETS.items()}
 
 
-def evaluate_reply(state: AgentState):
-    """Evaluate the email reply"""
+def remaining_seconds(state: AgentState, config: Optional[RunnableConfig]) -> float:
+    """Seconds left in the run's time budget"""
+    
+    return run_budgets(config)["max_seconds"] - (time.time() - state['started_at'])
+
+
+async def within_time_budget(call, state: AgentState, config: Optional[RunnableConfig]):
+    """Await an LLM call, giving up with TimeoutError when the time budget runs out"""
+    
+    remaining = remaining_seconds(state, config)
+    
+    if remaining <= 0:
+        raise TimeoutError
+    
+    return await asyncio.wait_for(call(), remaining)
+
+
+# The clock starts before the first generation, not after it
+def start_run(state: AgentState):
+    """Record when the run started"""
+    
+    return {"started_at": time.time()}
+
+
+async def astart_run(state: AgentState):
+    """Record when the run started (async)"""
+    
+    return start_run(state)
+
+
+def draft_update(state: AgentState, response) -> dict:
+    """State update for a new draft, counting the iteration and its tokens"""
+    
+    return {
+        "draft_reply": response.content,
+        "iterations": state.get("iterations", 0) + 1,
+        "tokens_used": state.get("tokens_used", 0) + used_tokens(response),
+    }
+
+
+#Generate email node
+def generate_reply_email(state: AgentState, config: RunnableConfig):
+    """Generate an email reply"""
+    
+    # A sync call can't be interrupted, so only start it with time left
+    if remaining_seconds(state, config) <= 0:
+        return {"stop_reason": "max_seconds"}
+    
+    response = llm.invoke(generate_reply_messages(state))
+    
+    return draft_update(state, response)
+
+
+async def agenerate_reply_email(state: AgentState, config: RunnableConfig):
+    """Generate an email reply (async)"""
+    
+    try:
+        response = await within_time_budget(lambda: llm.ainvoke(generate_reply_messages(state)), state, config)
+    except TimeoutError:
+        return {"stop_reason": "max_seconds"}
+    
+    return draft_update(state, response)
+
+
+def evaluate_reply_messages(state: AgentState) -> list[dict]:
+    """Build the prompt for evaluating the email reply"""
     
     customer_email = state['customer_email']
     
@@ -66,31 +168,148 @@ def evaluate_reply(state: AgentState):
     
     system_instruction = """You are a helpful assistant that can evaluate an email reply."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": f"Here is the draft reply {draft_reply} and the actual email {customer_email}. Please evaluate the email reply."}
     ]
-    response = evaluator_llm.invoke(messages)
+
+
+def evaluation_update(state: AgentState, response: dict) -> dict:
+    """State update for an evaluation, keeping track of the best draft so far"""
+    
+    verdict = response["parsed"]
+    
+    if verdict is None:
+        # An unparseable verdict counts as a failed, lowest-scoring evaluation
+        verdict = EmailReplyFeedback(quality="fail", feedback="", score=0)
+    
+    update = {
+        "quality": verdict.quality,
+        "feedback": verdict.feedback,
+        "score": verdict.score,
+        "tokens_used": state.get("tokens_used", 0) + used_tokens(response["raw"]),
+    }
+    
+    # A passing draft ends the loop, so the best draft only competes on score
+    if verdict.score > state.get("best_score", -1):
+        update["best_reply"] = state['draft_reply']
+        update["best_score"] = verdict.score
+    
+    return update
+
+
+def evaluate_reply(state: AgentState, config: RunnableConfig):
+    """Evaluate the email reply"""
     
-    return {"quality": response.quality, "feedback": response.feedback}
+    if remaining_seconds(state, config) <= 0:
+        return {"stop_reason": "max_seconds"}
+    
+    response = evaluator_llm.invoke(evaluate_reply_messages(state))
+    
+    return evaluation_update(state, response)
+
+
+async def aevaluate_reply(state: AgentState, config: RunnableConfig):
+    """Evaluate the email reply (async)"""
+    
+    try:
+        response = await within_time_budget(lambda: evaluator_llm.ainvoke(evaluate_reply_messages(state)), state, config)
+    except TimeoutError:
+        return {"stop_reason": "max_seconds"}
+    
+    return evaluation_update(state, response)
 
 
-def router_by_quality(state: AgentState):
+def exhausted_budget(state: AgentState, config: Optional[RunnableConfig]) -> Optional[str]:
+    """Name of the first budget the run has used up, or None"""
+    
+    # Set when an LLM call was skipped or cut short
+    if state.get("stop_reason"):
+        return state['stop_reason']
+    
+    budgets = run_budgets(config)
+    
+    if state.get("iterations", 0) >= budgets["max_iterations"]:
+        return "max_iterations"
+    
+    if time.time() - state.get("started_at", time.time()) >= budgets["max_seconds"]:
+        return "max_seconds"
+    
+    if state.get("tokens_used", 0) >= budgets["max_tokens"]:
+        return "max_tokens"
+    
+    return None
+
+
+def router_after_draft(state: AgentState):
+    """Evaluate the new draft, unless the time budget ran out before it was written"""
+    
+    if state.get("stop_reason"):
+        return "Exhausted"
+    
+    return "Drafted"
+
+
+def router_by_quality(state: AgentState, config: RunnableConfig):
     """Router by quality"""
     
+    if state.get("stop_reason"):
+        return "Exhausted"
+    
     if state['quality'] == "pass":
         return "Accepted"
     
+    if exhausted_budget(state, config):
+        return "Exhausted"
+    
     return "Rejected"
 
 
+def finalize_reply(state: AgentState, config: RunnableConfig):
+    """Pick the final reply and record the run stats"""
+    
+    accepted = not state.get("stop_reason") and state.get("quality") == "pass"
+    
+    # Without any evaluated draft, an unevaluated one beats no reply
+    final_reply = state['draft_reply'] if accepted else state.get("best_reply") or state.get("draft_reply", "")
+    
+    stats = {
+        "iterations": state.get("iterations", 0),
+        "tokens_used": state.get("tokens_used", 0),
+        "elapsed_seconds": round(time.time() - state.get("started_at", time.time()), 3),
+        "stop_reason": "accepted" if accepted else exhausted_budget(state, config),
+        "final_score": state['score'] if accepted else state.get("best_score"),
+    }
+    
+    return {"final_reply": final_reply, "stats": stats}
+
+
+async def afinalize_reply(state: AgentState, config: RunnableConfig):
+    """Pick the final reply and record the run stats (async)"""
+    
+    return finalize_reply(state, config)
+
+
 graph_builder = StateGraph(AgentState)
-graph_builder.add_node("generate_reply_email", generate_reply_email)
-graph_builder.add_node("evaluate_reply", evaluate_reply)
+# graph.invoke runs the sync node functions, graph.ainvoke their async twins
+graph_builder.add_node("start_run", RunnableLambda(start_run, afunc=astart_run))
+graph_builder.add_node("generate_reply_email", RunnableLambda(generate_reply_email, afunc=agenerate_reply_email))
+graph_builder.add_node("evaluate_reply", RunnableLambda(evaluate_reply, afunc=aevaluate_reply))
+graph_builder.add_node("finalize_reply", RunnableLambda(finalize_reply, afunc=afinalize_reply))
 
 
-graph_builder.add_edge(START, "generate_reply_email")
-graph_builder.add_edge("generate_reply_email", "evaluate_reply")
-graph_builder.add_conditional_edges("evaluate_reply", router_by_quality, {"Accepted": END, "Rejected": "generate_reply_email"})
+graph_builder.add_edge(START, "start_run")
+graph_builder.add_edge("start_run", "generate_reply_email")
+graph_builder.add_conditional_edges(
+    "generate_reply_email",
+    router_after_draft,
+    {"Drafted": "evaluate_reply", "Exhausted": "finalize_reply"},
+)
+graph_builder.add_conditional_edges(
+    "evaluate_reply",
+    router_by_quality,
+    {"Accepted": "finalize_reply", "Exhausted": "finalize_reply", "Rejected": "generate_reply_email"},
+)
+graph_builder.add_edge("finalize_reply", END)
 
-graph = graph_builder.compile()
+graph = instrument(graph_builder.compile(), "evaluator_optimizer")
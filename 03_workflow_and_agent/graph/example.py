@@ -2,11 +2,13 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import MessagesState
 from pydantic import BaseModel, Field
 from typing import TypedDict, Literal
-from langchain.chat_models import init_chat_model
+from graph.models import get_chat_model
+from graph.instrumentation import instrument
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import tool
-from langchain_core.messages import ToolMessage
+from langchain_core.messages import AIMessage, ToolMessage
 
-llm = init_chat_model("openai:gpt-4o-mini")
+llm = get_chat_model("openai:gpt-4o-mini")
 
 # Define the state
 class AgentState(MessagesState):
@@ -21,29 +23,47 @@ class SearchQuery(BaseModel):
 structured_llm = llm.with_structured_output(SearchQuery)
 
 # Define the nodes
-def llm_call(state: AgentState):
-    """LLM call"""
+def llm_call_messages(state: AgentState) -> list:
+    """Build the prompt for the LLM call"""
     
     messages = state['messages']
     
     system_instruction = """You are a helpful assistant tasked with coming up with a search query for a user."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction}
     ] + messages
+
+
+def search_query_message(response: SearchQuery) -> AIMessage:
+    """Wrap the structured output in a message, the only thing MessagesState accepts"""
+    
+    return AIMessage(content=response.model_dump_json())
+
+
+def llm_call(state: AgentState):
+    """LLM call"""
+    
+    response = structured_llm.invoke(llm_call_messages(state))
+    
+    return {"messages": [search_query_message(response)]}
+
+
+async def allm_call(state: AgentState):
+    """LLM call (async)"""
     
-    response = structured_llm.invoke(messages)
+    response = await structured_llm.ainvoke(llm_call_messages(state))
     
-    return {"messages": [response]}
+    return {"messages": [search_query_message(response)]}
 
 
 
 graph_builder = StateGraph(AgentState)
 
-graph_builder.add_node("llm_call", llm_call)
+graph_builder.add_node("llm_call", RunnableLambda(llm_call, afunc=allm_call))
 
 graph_builder.add_edge(START, "llm_call")
 graph_builder.add_edge("llm_call", END)
 
-graph = graph_builder.compile()
+graph = instrument(graph_builder.compile(), "example")
 
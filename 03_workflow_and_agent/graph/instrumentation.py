@@ -0,0 +1,404 @@
+"""Per-node latency and token instrumentation for compiled graphs.
+
+Wrap a compiled graph with ``instrument`` to record, for every node run:
+
+- wall time
+- time spent waiting on the LLM and the remaining Python overhead
+- prompt and completion tokens, and the number of LLM calls
+- responses served by a response cache (``cache_hits``), which are left out
+  of the LLM time, calls and tokens
+- per run, the time to the first LLM output token (``ttft_seconds``)
+
+Metrics are exported in Prometheus text format (``prometheus_text``) and as
+JSON run summaries (``GraphMetrics.run_summaries``). Set
+``GRAPH_RUN_SUMMARY_PATH`` to append every run summary to a JSONL file, and
+``GRAPH_METRICS_PORT`` to serve ``/metrics`` over HTTP.
+
+Copied into every LangGraph project, which are deployed on their own. Edit
+this copy (``03_workflow_and_agent/graph``) and run
+``scripts/sync_shared_modules.py`` to update the others.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# Upper bounds (seconds) of the node duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+RUN_SUMMARY_PATH = os.getenv("GRAPH_RUN_SUMMARY_PATH")
+
+_handlers: list["GraphMetrics"] = []
+_handlers_lock = threading.Lock()
+_metrics_server: Optional[ThreadingHTTPServer] = None
+
+
+class _NodeTotals:
+    """Aggregated metrics for one node."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.wall_seconds = 0.0
+        self.llm_seconds = 0.0
+        self.llm_calls = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+    def observe(self, node_run: dict) -> None:
+        self.count += 1
+        self.errors += node_run["error"]
+        self.wall_seconds += node_run["wall_seconds"]
+        self.llm_seconds += node_run["llm_seconds"]
+        self.llm_calls += node_run["llm_calls"]
+        self.cache_hits += node_run["cache_hits"]
+        self.prompt_tokens += node_run["prompt_tokens"]
+        self.completion_tokens += node_run["completion_tokens"]
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if node_run["wall_seconds"] <= bound:
+                self.buckets[i] += 1
+
+
+class GraphMetrics(BaseCallbackHandler):
+    """Callback handler that times graph nodes and the LLM calls inside them."""
+
+    # Bookkeeping is cheap, so run in the caller's thread/event loop
+    run_inline = True
+
+    def __init__(self, graph_name: str, max_summaries: int = 1000):
+        """Initialize the handler.
+
+        Args:
+            graph_name: Value of the ``graph`` label on every metric.
+            max_summaries: Number of recent run summaries to keep in memory.
+        """
+        self.graph_name = graph_name
+        self._lock = threading.Lock()
+        self._totals: dict[str, _NodeTotals] = defaultdict(_NodeTotals)
+        self._run_count = 0
+        self._run_seconds = 0.0
+        self._summaries: deque[dict] = deque(maxlen=max_summaries)
+
+        # In-flight bookkeeping, keyed by LangChain run id
+        self._roots: dict[UUID, dict] = {}
+        self._root_of: dict[UUID, UUID] = {}
+        self._node_runs: dict[UUID, dict] = {}
+        self._node_of: dict[UUID, UUID] = {}
+        self._llm_starts: dict[UUID, float] = {}
+
+    # -- run tracking -----------------------------------------------------
+
+    def _track(self, run_id: UUID, parent_run_id: Optional[UUID], metadata: Optional[dict]) -> None:
+        if parent_run_id is None or parent_run_id not in self._root_of:
+            # Top-level graph run
+            self._roots[run_id] = {"start": time.perf_counter(), "nodes": [], "first_output": None}
+            self._root_of[run_id] = run_id
+            return
+
+        self._root_of[run_id] = self._root_of[parent_run_id]
+
+        node = (metadata or {}).get("langgraph_node")
+        enclosing = self._node_runs.get(self._node_of.get(parent_run_id))
+        if enclosing is not None and node in (None, enclosing["node"]):
+            # Anything started inside a node is attributed to that node run,
+            # unless it is tagged as another node (work a node runs on that node's behalf)
+            self._node_of[run_id] = self._node_of[parent_run_id]
+        elif node:
+            self._node_runs[run_id] = {
+                "node": node,
+                "step": metadata.get("langgraph_step"),
+                "start": time.perf_counter(),
+                "llm_seconds": 0.0,
+                "llm_calls": 0,
+                "cache_hits": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+            }
+            self._node_of[run_id] = run_id
+
+    def _finish(self, run_id: UUID, error: bool) -> None:
+        now = time.perf_counter()
+        root_id = self._root_of.pop(run_id, None)
+        self._node_of.pop(run_id, None)
+
+        node_run = self._node_runs.pop(run_id, None)
+        if node_run is not None:
+            node_run["wall_seconds"] = now - node_run.pop("start")
+            node_run["overhead_seconds"] = max(node_run["wall_seconds"] - node_run["llm_seconds"], 0.0)
+            node_run["error"] = error
+            self._totals[node_run["node"]].observe(node_run)
+            if root_id in self._roots:
+                self._roots[root_id]["nodes"].append(node_run)
+
+        root = self._roots.pop(run_id, None)
+        if root is not None:
+            self._finish_root(run_id, root, now, error)
+
+    def _finish_root(self, run_id: UUID, root: dict, now: float, error: bool) -> None:
+        nodes = root["nodes"]
+        summary = {
+            "graph": self.graph_name,
+            "run_id": str(run_id),
+            "error": error,
+            "wall_seconds": now - root["start"],
+            "llm_seconds": sum(node["llm_seconds"] for node in nodes),
+            "llm_calls": sum(node["llm_calls"] for node in nodes),
+            "cache_hits": sum(node["cache_hits"] for node in nodes),
+            "prompt_tokens": sum(node["prompt_tokens"] for node in nodes),
+            "completion_tokens": sum(node["completion_tokens"] for node in nodes),
+            "ttft_seconds": root["first_output"] - root["start"] if root["first_output"] is not None else None,
+            "nodes": nodes,
+        }
+        summary["overhead_seconds"] = max(summary["wall_seconds"] - summary["llm_seconds"], 0.0)
+
+        self._run_count += 1
+        self._run_seconds += summary["wall_seconds"]
+        self._summaries.append(summary)
+
+        if RUN_SUMMARY_PATH:
+            with open(RUN_SUMMARY_PATH, "a") as f:
+                f.write(json.dumps(summary) + "\n")
+
+    # -- callbacks --------------------------------------------------------
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs) -> None:
+        with self._lock:
+            self._track(run_id, parent_run_id, metadata)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs) -> None:
+        with self._lock:
+            self._finish(run_id, error=False)
+
+    def on_chain_error(self, error, *, run_id, **kwargs) -> None:
+        with self._lock:
+            self._finish(run_id, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, metadata=None, **kwargs) -> None:
+        with self._lock:
+            self._track(run_id, parent_run_id, metadata)
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        with self._lock:
+            self._finish(run_id, error=False)
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        with self._lock:
+            self._finish(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs) -> None:
+        with self._lock:
+            self._track(run_id, parent_run_id, metadata)
+            self._llm_starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs) -> None:
+        with self._lock:
+            self._track(run_id, parent_run_id, metadata)
+            self._llm_starts[run_id] = time.perf_counter()
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs) -> None:
+        with self._lock:
+            self._mark_first_output(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs) -> None:
+        with self._lock:
+            self._record_llm(run_id, response)
+            self._finish(run_id, error=False)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        with self._lock:
+            self._record_llm(run_id, None)
+            self._finish(run_id, error=True)
+
+    def _mark_first_output(self, run_id: UUID) -> None:
+        # Streamed calls report their first token; others count from their whole response
+        root = self._roots.get(self._root_of.get(run_id))
+        if root is not None and root["first_output"] is None:
+            root["first_output"] = time.perf_counter()
+
+    def _record_llm(self, run_id: UUID, response: Optional[LLMResult]) -> None:
+        if response is not None:
+            self._mark_first_output(run_id)
+        start = self._llm_starts.pop(run_id, None)
+        node_run = self._node_runs.get(self._node_of.get(run_id))
+        if start is None or node_run is None:
+            return
+
+        generations_list = response.generations if response else []
+        # Responses served by a response cache are not model calls: count them apart
+        if any((generation.generation_info or {}).get("cache_hit") for generations in generations_list for generation in generations):
+            node_run["cache_hits"] += 1
+            return
+
+        node_run["llm_seconds"] += time.perf_counter() - start
+        node_run["llm_calls"] += 1
+
+        for generations in generations_list:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                node_run["prompt_tokens"] += usage.get("input_tokens", 0)
+                node_run["completion_tokens"] += usage.get("output_tokens", 0)
+
+    # -- export -----------------------------------------------------------
+
+    def run_summaries(self) -> list[dict]:
+        """Return the most recent run summaries, oldest first."""
+        with self._lock:
+            return list(self._summaries)
+
+    def run_summary(self, run_id: UUID) -> Optional[dict]:
+        """Return the summary of a recent run, by the ``run_id`` it was invoked with."""
+        run_id = str(run_id)
+        with self._lock:
+            return next((summary for summary in reversed(self._summaries) if summary["run_id"] == run_id), None)
+
+    def summary(self) -> dict:
+        """Return aggregated per-node metrics as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                "graph": self.graph_name,
+                "runs": self._run_count,
+                "run_seconds": self._run_seconds,
+                "nodes": {
+                    node: {
+                        "count": totals.count,
+                        "errors": totals.errors,
+                        "wall_seconds": totals.wall_seconds,
+                        "llm_seconds": totals.llm_seconds,
+                        "overhead_seconds": max(totals.wall_seconds - totals.llm_seconds, 0.0),
+                        "llm_calls": totals.llm_calls,
+                        "cache_hits": totals.cache_hits,
+                        "prompt_tokens": totals.prompt_tokens,
+                        "completion_tokens": totals.completion_tokens,
+                    }
+                    for node, totals in self._totals.items()
+                },
+            }
+
+    def prometheus_samples(self) -> dict[str, list[str]]:
+        """Return Prometheus sample lines grouped by metric family."""
+        samples: dict[str, list[str]] = defaultdict(list)
+        graph = self.graph_name
+
+        with self._lock:
+            samples["langgraph_runs_total"].append(f'langgraph_runs_total{{graph="{graph}"}} {self._run_count}')
+            samples["langgraph_run_seconds_total"].append(
+                f'langgraph_run_seconds_total{{graph="{graph}"}} {self._run_seconds}'
+            )
+
+            for node, totals in self._totals.items():
+                labels = f'graph="{graph}",node="{node}"'
+                family = samples["langgraph_node_duration_seconds"]
+                for bound, count in zip(DURATION_BUCKETS, totals.buckets):
+                    family.append(f'langgraph_node_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                family.append(f'langgraph_node_duration_seconds_bucket{{{labels},le="+Inf"}} {totals.count}')
+                family.append(f"langgraph_node_duration_seconds_sum{{{labels}}} {totals.wall_seconds}")
+                family.append(f"langgraph_node_duration_seconds_count{{{labels}}} {totals.count}")
+
+                overhead = max(totals.wall_seconds - totals.llm_seconds, 0.0)
+                for name, value in (
+                    ("langgraph_node_llm_seconds_total", totals.llm_seconds),
+                    ("langgraph_node_overhead_seconds_total", overhead),
+                    ("langgraph_node_llm_calls_total", totals.llm_calls),
+                    ("langgraph_node_cache_hits_total", totals.cache_hits),
+                    ("langgraph_node_prompt_tokens_total", totals.prompt_tokens),
+                    ("langgraph_node_completion_tokens_total", totals.completion_tokens),
+                    ("langgraph_node_errors_total", totals.errors),
+                ):
+                    samples[name].append(f"{name}{{{labels}}} {value}")
+
+        return samples
+
+
+_METRIC_HELP = {
+    "langgraph_runs_total": ("counter", "Completed graph runs."),
+    "langgraph_run_seconds_total": ("counter", "Wall time spent in graph runs."),
+    "langgraph_node_duration_seconds": ("histogram", "Wall time per node run."),
+    "langgraph_node_llm_seconds_total": ("counter", "Time nodes spent waiting on LLM calls."),
+    "langgraph_node_overhead_seconds_total": ("counter", "Node wall time not spent in LLM calls."),
+    "langgraph_node_llm_calls_total": ("counter", "LLM calls made by nodes."),
+    "langgraph_node_cache_hits_total": ("counter", "LLM responses served from a response cache."),
+    "langgraph_node_prompt_tokens_total": ("counter", "Prompt tokens used by nodes."),
+    "langgraph_node_completion_tokens_total": ("counter", "Completion tokens used by nodes."),
+    "langgraph_node_errors_total": ("counter", "Node runs that raised."),
+}
+
+
+def prometheus_text() -> str:
+    """Render the metrics of every instrumented graph in Prometheus text format."""
+    with _handlers_lock:
+        handlers = list(_handlers)
+
+    families: dict[str, list[str]] = defaultdict(list)
+    for handler in handlers:
+        for name, lines in handler.prometheus_samples().items():
+            families[name].extend(lines)
+
+    output = []
+    for name, (metric_type, help_text) in _METRIC_HELP.items():
+        if families.get(name):
+            output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {metric_type}")
+            output.extend(families[name])
+    return "\n".join(output) + "\n"
+
+
+def get_graph_metrics(graph_name: str) -> Optional[GraphMetrics]:
+    """Return the handler of the graph instrumented as ``graph_name``."""
+    with _handlers_lock:
+        return next((handler for handler in _handlers if handler.graph_name == graph_name), None)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a background thread. Only one server is started."""
+    global _metrics_server
+    with _handlers_lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+            threading.Thread(target=_metrics_server.serve_forever, name="graph-metrics", daemon=True).start()
+        return _metrics_server
+
+
+def instrument(graph: Any, graph_name: str) -> Any:
+    """Attach a ``GraphMetrics`` handler to a compiled graph.
+
+    Args:
+        graph: The compiled graph.
+        graph_name: Name used as the ``graph`` label, usually its langgraph.json key.
+
+    Returns:
+        A copy of the graph that reports every run to the handler. The handler
+        can be looked up later with ``get_graph_metrics(graph_name)``.
+    """
+    handler = GraphMetrics(graph_name)
+    with _handlers_lock:
+        _handlers.append(handler)
+
+    if os.getenv("GRAPH_METRICS_PORT"):
+        start_metrics_server(int(os.environ["GRAPH_METRICS_PORT"]))
+
+    return graph.with_config(callbacks=[handler])
@@ -1,8 +1,12 @@
+import asyncio
 from pydantic import BaseModel, Field
 from typing import List
-from langchain.chat_models import init_chat_model
+from graph.models import get_chat_model
+from graph.instrumentation import instrument
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import patch_config
 
-llm = init_chat_model("openai:gpt-4o-mini")
+llm = get_chat_model("openai:gpt-4o-mini")
 
 #Schema for structured output to use in planning
 class Section(BaseModel):
@@ -13,6 +17,9 @@ class Sections(BaseModel):
     sections: List[Section] = Field(description="List of sections to be covered in the report")
     
 planner_llm = llm.with_structured_output(Sections)
+
+# Same plan as a forced tool call, so its arguments can be parsed while they stream
+planner_stream_llm = llm.bind_tools([Sections], tool_choice="Sections")
     
     
     
@@ -35,42 +42,115 @@ class WorkerState(TypedDict):
     completed_sections: Annotated[list, operator.add]
     
     
-#Orchestrator
-def orchestrator(state: SharedState):
-    """Orchestrator to generate a plan for the report"""
+#Orchestrator prompt
+def orchestrator_messages(state: SharedState) -> list[dict]:
+    """Build the prompt for planning the report"""
     
     user_query = state['messages'][-1].content
     
     system_instruction = """You are a helpful assistant that can generate a plan for the report."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": f"Here is the report topic {user_query}. Please generate a plan for the report."}
     ]
     
-    response = planner_llm.invoke(messages)
+    
+#Orchestrator
+def orchestrator(state: SharedState):
+    """Orchestrator to generate a plan for the report"""
+    
+    response = planner_llm.invoke(orchestrator_messages(state))
     
     return {"sections": response.sections}
+
+
+async def aorchestrator(state: SharedState, config: RunnableConfig):
+    """Orchestrator to generate a plan for the report (async)
+    
+    The plan is parsed while it streams, and each section's worker starts as
+    soon as that section is complete, so planning and writing overlap. The
+    completed sections are returned in plan order together with the plan.
+    
+    Workers run as child runs named and tagged as the "worker" node, so
+    instrumentation and streamed events attribute their LLM calls to "worker"
+    as on the sync path.
+    """
+    
+    sections: list[Section] = []
+    workers: list[asyncio.Task] = []
+    
+    worker_config = patch_config(config, run_name="worker")
+    worker_config["metadata"] = {**worker_config.get("metadata", {}), "langgraph_node": "worker"}
+    
+    def start_workers(planned: list[dict], plan_done: bool = False):
+        # A section is complete once the next one has started, or the plan has ended
+        ready = len(planned) if plan_done else len(planned) - 1
+        while len(sections) < ready:
+            section = Section(**planned[len(sections)])
+            sections.append(section)
+            workers.append(asyncio.create_task(worker_node.ainvoke({"section": section}, worker_config)))
+    
+    planned: list[dict] = []
+    gathered = None
+    
+    try:
+        async for chunk in planner_stream_llm.astream(orchestrator_messages(state)):
+            gathered = chunk if gathered is None else gathered + chunk
+            # tool_calls holds the partially parsed arguments streamed so far
+            if gathered.tool_calls:
+                planned = gathered.tool_calls[0]["args"].get("sections", [])
+                start_workers(planned)
+        
+        start_workers(planned, plan_done=True)
+        
+        results = await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        raise
     
+    return {
+        "sections": sections,
+        "completed_sections": [result["completed_sections"][0] for result in results],
+    }
     
-#Worker
-def worker(state: WorkerState):
-    """Worker to write a section of the report"""
+    
+#Worker prompt
+def worker_messages(state: WorkerState) -> list[dict]:
+    """Build the prompt for writing a section of the report"""
     
     section_name = state['section'].name
     section_description = state['section'].description
     
     system_instruction = """Write a report section following the provided name and description. Include no preamble for each section. Use markdown formatting."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": f"Here is the section name {section_name} and description {section_description}. Please write a report section following the provided name and description."}
     ]
     
-    response = llm.invoke(messages)
+    
+#Worker
+def worker(state: WorkerState):
+    """Worker to write a section of the report"""
+    
+    response = llm.invoke(worker_messages(state))
+    
+    return {"completed_sections": [response.content]}
+
+
+async def aworker(state: WorkerState):
+    """Worker to write a section of the report (async)"""
+    
+    response = await llm.ainvoke(worker_messages(state))
     
     return {"completed_sections": [response.content]}
 
+# The worker node, also run directly by the async orchestrator
+worker_node = RunnableLambda(worker, afunc=aworker, name="worker")
+
+
 def synthesizer(state: SharedState):
     """Synthesize the completed sections into a final report"""
     
@@ -78,22 +158,33 @@ def synthesizer(state: SharedState):
     
     return {"final_report": final_report}
 
+
+async def asynthesizer(state: SharedState):
+    """Synthesize the completed sections into a final report (async)"""
+    
+    return synthesizer(state)
+
 def assign_workers(state: SharedState):
     """Assign a worker to write a section of the report"""
     
+    # The async orchestrator already wrote every section while the plan streamed
+    if state.get("completed_sections"):
+        return "synthesizer"
+    
     return [Send("worker", {"section": section}) for section in state["sections"]]
     
     
 graph_builder = StateGraph(SharedState)
-graph_builder.add_node("orchestrator", orchestrator)
-graph_builder.add_node("worker", worker)
-graph_builder.add_node("synthesizer", synthesizer)
+# graph.invoke runs the sync node functions, graph.ainvoke their async twins
+graph_builder.add_node("orchestrator", RunnableLambda(orchestrator, afunc=aorchestrator))
+graph_builder.add_node("worker", worker_node, input_schema=WorkerState)
+graph_builder.add_node("synthesizer", RunnableLambda(synthesizer, afunc=asynthesizer))
 
 graph_builder.add_edge(START, "orchestrator")
-graph_builder.add_conditional_edges("orchestrator", assign_workers, ["worker"])
+graph_builder.add_conditional_edges("orchestrator", assign_workers, ["worker", "synthesizer"])
 
 graph_builder.add_edge("worker", "synthesizer")
 graph_builder.add_edge("synthesizer", END)
-graph = graph_builder.compile()
+graph = instrument(graph_builder.compile(), "orchestrator")
         
     
\ No newline at end of file
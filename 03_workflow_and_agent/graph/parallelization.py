@@ -1,10 +1,29 @@
+import asyncio
+import os
+from typing import AsyncIterator, Optional
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import MessagesState
 from pydantic import BaseModel, Field
 from typing import TypedDict
-from langchain.chat_models import init_chat_model
+from graph.models import get_chat_model
+from graph.instrumentation import instrument
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
-llm = init_chat_model("openai:gpt-4o-mini")
+llm = get_chat_model("openai:gpt-4o-mini")
+
+# Default per-branch deadline in seconds for the async path (unset = no deadline).
+# Override per run with config={"configurable": {"branch_deadline": 5}}.
+BRANCH_DEADLINE_SECONDS = os.getenv("BRANCH_DEADLINE_SECONDS")
+
+# Text used for a branch that produced nothing before its deadline
+BRANCH_TIMEOUT_TEXT = "(not ready in time)"
+
+# Branch node -> state key / section it fills
+BRANCH_SECTIONS = {
+    "generate_story": "story",
+    "generate_joke": "joke",
+    "generate_poem": "poem",
+}
 
 # Define the state
 class AgentState(MessagesState):
@@ -16,57 +35,118 @@ class AgentState(MessagesState):
     
     
     
-def generate_joke(state: AgentState) -> AgentState:
-    """Generate a joke"""
+def get_branch_deadline(config: Optional[RunnableConfig]) -> Optional[float]:
+    """Read the per-branch deadline from the run config or the environment"""
+    
+    deadline = (config or {}).get("configurable", {}).get("branch_deadline", BRANCH_DEADLINE_SECONDS)
+    
+    return float(deadline) if deadline is not None else None
+
+
+async def astream_branch(messages: list[dict], config: Optional[RunnableConfig]) -> str:
+    """Stream one branch's reply, cutting it off at the branch deadline.
+    
+    Tokens are streamed so that callers using stream_mode="messages" see them
+    as they arrive. When the deadline passes, whatever was generated so far is
+    returned instead of waiting for the rest.
+    """
+    
+    parts = []
+    
+    async def consume():
+        async for chunk in llm.astream(messages, config):
+            parts.append(chunk.content)
+    
+    try:
+        await asyncio.wait_for(consume(), get_branch_deadline(config))
+    except asyncio.TimeoutError:
+        partial = "".join(parts)
+        return f"{partial} ..." if partial else BRANCH_TIMEOUT_TEXT
+    
+    return "".join(parts)
+
+
+def joke_messages(state: AgentState) -> list[dict]:
+    """Build the prompt for the joke branch"""
     
     user_query = state['messages'][-1].content
     
     system_instruction = """You are a helpful assistant that can generate a joke."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": user_query}
     ]
+
+
+def generate_joke(state: AgentState) -> AgentState:
+    """Generate a joke"""
     
-    response = llm.invoke(messages)
+    response = llm.invoke(joke_messages(state))
     
     return {"joke": response.content}
 
 
-def generate_poem(state: AgentState) -> AgentState:
-    """Generate a poem"""
+async def agenerate_joke(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Generate a joke (async)"""
+    
+    return {"joke": await astream_branch(joke_messages(state), config)}
+
+
+def poem_messages(state: AgentState) -> list[dict]:
+    """Build the prompt for the poem branch"""
     
     user_query = state['messages'][-1].content
     
     system_instruction = """You are a helpful assistant that can generate a poem."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": user_query}
     ]
+
+
+def generate_poem(state: AgentState) -> AgentState:
+    """Generate a poem"""
     
-    response = llm.invoke(messages)
+    response = llm.invoke(poem_messages(state))
     
     return {"poem": response.content}
 
 
-def generate_story(state: AgentState) -> AgentState:
-    """Generate a story"""
+async def agenerate_poem(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Generate a poem (async)"""
+    
+    return {"poem": await astream_branch(poem_messages(state), config)}
+
+
+def story_messages(state: AgentState) -> list[dict]:
+    """Build the prompt for the story branch"""
     
     user_query = state['messages'][-1].content
     
     system_instruction = """You are a helpful assistant that can generate a story."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": user_query}
     ]
+
+
+def generate_story(state: AgentState) -> AgentState:
+    """Generate a story"""
     
-    response = llm.invoke(messages)
+    response = llm.invoke(story_messages(state))
     
     return {"story": response.content}
 
 
+async def agenerate_story(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Generate a story (async)"""
+    
+    return {"story": await astream_branch(story_messages(state), config)}
+
+
 def combine_output(state: AgentState) -> AgentState:
     """Combine the output"""
     
@@ -74,24 +154,31 @@ def combine_output(state: AgentState) -> AgentState:
     
     combine_output = f"Here is a story, joke, and open about {user_query}\n\n"
     
-    combine_output += f"STORY: {state['story']}\n\n"
+    combine_output += f"STORY: {state.get('story') or BRANCH_TIMEOUT_TEXT}\n\n"
     
-    combine_output += f"JOKE: {state['joke']}\n\n"
+    combine_output += f"JOKE: {state.get('joke') or BRANCH_TIMEOUT_TEXT}\n\n"
     
-    combine_output += f"POEM: {state['poem']}\n\n"
+    combine_output += f"POEM: {state.get('poem') or BRANCH_TIMEOUT_TEXT}\n\n"
     
     return {"combined_output": combine_output}
+
+
+async def acombine_output(state: AgentState) -> AgentState:
+    """Combine the output (async)"""
     
-    
-    
+    return combine_output(state)
+
+
+
 # Define the graph
 graph_builder = StateGraph(AgentState)
 
-# Add nodes
-graph_builder.add_node("generate_joke", generate_joke)
-graph_builder.add_node("generate_poem", generate_poem)
-graph_builder.add_node("generate_story", generate_story)
-graph_builder.add_node("combine_output", combine_output)
+# Add nodes. Each node carries a sync and an async implementation:
+# graph.invoke runs the former, graph.ainvoke the latter.
+graph_builder.add_node("generate_joke", RunnableLambda(generate_joke, afunc=agenerate_joke))
+graph_builder.add_node("generate_poem", RunnableLambda(generate_poem, afunc=agenerate_poem))
+graph_builder.add_node("generate_story", RunnableLambda(generate_story, afunc=agenerate_story))
+graph_builder.add_node("combine_output", RunnableLambda(combine_output, afunc=acombine_output))
 
 
 # Add edges
@@ -104,5 +191,39 @@ graph_builder.add_edge("generate_story", "combine_output")
 graph_builder.add_edge("combine_output", END)
 
 # Compile the graph
-graph = graph_builder.compile()
+graph = instrument(graph_builder.compile(), "parallelization")
+
 
+async def astream_sections(user_query: str, branch_deadline: Optional[float] = None) -> AsyncIterator[dict]:
+    """Run the graph and yield output as soon as it is available.
+    
+    Yields dicts of three kinds:
+    - {"type": "token", "section": ..., "content": ...} for each streamed token of a branch
+    - {"type": "section", "section": ..., "content": ...} when a branch finishes
+    - {"type": "combined", "content": ...} once all sections are combined
+    
+    Args:
+        user_query: The user query.
+        branch_deadline: Seconds each branch may run before its output is cut off.
+    """
+    
+    config = {"configurable": {"branch_deadline": branch_deadline}} if branch_deadline is not None else None
+    
+    async for mode, chunk in graph.astream(
+        {"messages": [{"role": "user", "content": user_query}]},
+        config,
+        stream_mode=["messages", "updates"],
+    ):
+        if mode == "messages":
+            message, metadata = chunk
+            section = BRANCH_SECTIONS.get(metadata.get("langgraph_node"))
+            if section and message.content:
+                yield {"type": "token", "section": section, "content": message.content}
+            continue
+    
+        for node, update in chunk.items():
+            if node in BRANCH_SECTIONS:
+                section = BRANCH_SECTIONS[node]
+                yield {"type": "section", "section": section, "content": update[section]}
+            elif node == "combine_output":
+                yield {"type": "combined", "content": update["combined_output"]}
@@ -2,9 +2,12 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import MessagesState
 from pydantic import BaseModel, Field
 from typing import TypedDict
-from langchain.chat_models import init_chat_model
+from graph.models import get_chat_model
+from graph.instrumentation import instrument
+from graph.router import default_cascade
+from langchain_core.runnables import RunnableLambda
 
-llm = init_chat_model("openai:gpt-4o-mini")
+llm = get_chat_model("openai:gpt-4o-mini")
 
 #Define the state
 class AgentState(MessagesState):
@@ -17,66 +20,130 @@ class AnalyzedInput(BaseModel):
     classification: str = Field(description="Classification of the input. Can be get_product_price or get_weather_info")
     reason: str = Field(description="Reason for the classification")
     
-# Define the analyze_user_input function
-def analyze_user_input(state: AgentState) -> AgentState:
-    """Analyze the user input"""
-    user_query = state['messages'][-1].content
+# LLM classifier, built once and only used when the local router is unsure
+structured_llm = llm.with_structured_output(AnalyzedInput)
+
+# Local classifiers tried before the LLM; router.stats() reports the local fraction
+router = default_cascade()
     
-    structured_llm = llm.with_structured_output(AnalyzedInput)
+# Define the analyze_user_input prompt
+def analyze_messages(state: AgentState) -> list[dict]:
+    """Build the prompt for analyzing the user input"""
+    user_query = state['messages'][-1].content
     
     system_instruction = """You are a helpful assistant that can analyze user input and classify it into one of two categories: get_product_price or get_weather_info."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": user_query}
     ]
+
+# Define the analyze_user_input function
+def analyze_user_input(state: AgentState) -> AgentState:
+    """Analyze the user input"""
+    user_query = state['messages'][-1].content
     
-    response = structured_llm.invoke(messages)
+    classification = router.classify_locally(user_query)
     
-    return {"classification": response.classification}
+    if classification is None:
+        response = structured_llm.invoke(analyze_messages(state))
+        classification = response.classification
+        router.record_fallback(user_query, classification)
+    
+    return {"classification": classification}
 
-# Define the get_product_price function
-def get_product_price(state: AgentState) -> AgentState:
-    """Get the product price"""
+
+async def aanalyze_user_input(state: AgentState) -> AgentState:
+    """Analyze the user input (async)"""
+    user_query = state['messages'][-1].content
+    
+    classification = router.classify_locally(user_query)
+    
+    if classification is None:
+        response = await structured_llm.ainvoke(analyze_messages(state))
+        classification = response.classification
+        await router.arecord_fallback(user_query, classification)
+    
+    return {"classification": classification}
+
+# Define the get_product_price prompt
+def get_product_price_messages(state: AgentState) -> list[dict]:
+    """Build the prompt for the get_product_price node"""
     
     system_instruction = """You are a helpful assistant that can get the product price."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": state['messages'][-1].content}
     ]
+
+# Define the get_product_price function
+def get_product_price(state: AgentState) -> AgentState:
+    """Get the product price"""
     
-    response = llm.invoke(messages)
+    response = llm.invoke(get_product_price_messages(state))
     
     return {"messages": [response]}
 
-# Define the get_weather_info function
-def get_weather_info(state: AgentState) -> AgentState:
-    """Get the weather info"""
+
+async def aget_product_price(state: AgentState) -> AgentState:
+    """Get the product price (async)"""
+    
+    response = await llm.ainvoke(get_product_price_messages(state))
+    
+    return {"messages": [response]}
+
+# Define the get_weather_info prompt
+def get_weather_info_messages(state: AgentState) -> list[dict]:
+    """Build the prompt for the get_weather_info node"""
     
     system_instruction = """You are a helpful assistant that can get the weather info."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": state['messages'][-1].content}
     ]
+
+# Define the get_weather_info function
+def get_weather_info(state: AgentState) -> AgentState:
+    """Get the weather info"""
     
-    response = llm.invoke(messages)
+    response = llm.invoke(get_weather_info_messages(state))
     
     return {"messages": [response]}
 
-#def translate to swahili function
-def translate_to_swahili(state: AgentState) -> AgentState:
-    """Translate the user input to swahili"""
+
+async def aget_weather_info(state: AgentState) -> AgentState:
+    """Get the weather info (async)"""
+    
+    response = await llm.ainvoke(get_weather_info_messages(state))
+    
+    return {"messages": [response]}
+
+# Define the translate_to_swahili prompt
+def translate_to_swahili_messages(state: AgentState) -> list[dict]:
+    """Build the prompt for the translate_to_swahili node"""
     
     system_instruction = """You are a helpful assistant that can translate user input to swahili."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction},
         {"role": "user", "content": state['messages'][-1].content}
     ]
+
+#def translate to swahili function
+def translate_to_swahili(state: AgentState) -> AgentState:
+    """Translate the user input to swahili"""
+    
+    response = llm.invoke(translate_to_swahili_messages(state))
+    
+    return {"messages": [response]}
+
+
+async def atranslate_to_swahili(state: AgentState) -> AgentState:
+    """Translate the user input to swahili (async)"""
     
-    response = llm.invoke(messages)
+    response = await llm.ainvoke(translate_to_swahili_messages(state))
     
     return {"messages": [response]}
 
@@ -93,11 +160,11 @@ def route_user_query(state: AgentState) -> AgentState:
 # Define the graph
 graph_builder = StateGraph(AgentState)
 
-# Add nodes
-graph_builder.add_node("analyze_user_input", analyze_user_input)
-graph_builder.add_node("get_product_price", get_product_price)
-graph_builder.add_node("get_weather_info", get_weather_info)
-graph_builder.add_node("translate_to_swahili", translate_to_swahili)
+# Add nodes. graph.invoke runs the sync functions, graph.ainvoke their async twins.
+graph_builder.add_node("analyze_user_input", RunnableLambda(analyze_user_input, afunc=aanalyze_user_input))
+graph_builder.add_node("get_product_price", RunnableLambda(get_product_price, afunc=aget_product_price))
+graph_builder.add_node("get_weather_info", RunnableLambda(get_weather_info, afunc=aget_weather_info))
+graph_builder.add_node("translate_to_swahili", RunnableLambda(translate_to_swahili, afunc=atranslate_to_swahili))
 
 # Add edges
 graph_builder.add_edge(START, "analyze_user_input")
@@ -107,7 +174,7 @@ graph_builder.add_edge("get_weather_info", "translate_to_swahili")
 graph_builder.add_edge("translate_to_swahili", END)
 
 # Compile the graph
-graph = graph_builder.compile()
+graph = instrument(graph_builder.compile(), "prompt_chaining")
 
     
     
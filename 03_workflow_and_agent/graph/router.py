@@ -0,0 +1,269 @@
+"""Cheap-first routing for the prompt chaining graph.
+
+``RoutingCascade`` asks local classifiers for a route first and only falls back
+to the LLM when none of them is confident enough. Two local classifiers are
+provided:
+
+- ``KeywordRouter``: hand written keyword rules.
+- ``HashedLinearRouter``: a softmax model over hashed word/bigram features,
+  trained from the routes the LLM decided (logged to ``ROUTER_LOG_PATH``).
+
+Train the linear model from the project directory with::
+
+    python -m graph.router .cache/routes.jsonl .cache/router_model.json
+"""
+import asyncio
+import atexit
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from typing import Iterable, Optional, Protocol
+
+ROUTES = ("get_product_price", "get_weather_info")
+
+_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+
+# Minimum confidence for a local decision
+ROUTER_THRESHOLD = float(os.getenv("ROUTER_THRESHOLD", "0.8"))
+
+# Where LLM-decided routes are logged, and where the trained linear model lives
+ROUTER_LOG_PATH = os.getenv("ROUTER_LOG_PATH", os.path.join(_CACHE_DIR, "routes.jsonl"))
+ROUTER_MODEL_PATH = os.getenv("ROUTER_MODEL_PATH", os.path.join(_CACHE_DIR, "router_model.json"))
+
+_WORD_RE = re.compile(r"[a-z0-9$]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens."""
+    return _WORD_RE.findall(text.lower())
+
+
+class Classifier(Protocol):
+    def classify(self, query: str) -> tuple[Optional[str], float]:
+        """Return (route, confidence), or (None, 0.0) when undecided."""
+        ...
+
+
+class KeywordRouter:
+    """Route on keyword hits."""
+
+    DEFAULT_KEYWORDS = {
+        "get_product_price": {
+            "price", "prices", "cost", "costs", "much", "buy", "sell", "cheap", "cheaper",
+            "expensive", "$", "usd", "dollars", "discount", "deal", "afford", "pay",
+        },
+        "get_weather_info": {
+            "weather", "temperature", "rain", "raining", "sunny", "forecast", "snow", "wind",
+            "windy", "humid", "humidity", "cloudy", "storm", "hot", "cold", "degrees", "climate",
+        },
+    }
+
+    def __init__(self, keywords: Optional[dict[str, set[str]]] = None, smoothing: float = 0.25):
+        """Initialize the router.
+
+        Args:
+            keywords: Route -> keyword set. Defaults to ``DEFAULT_KEYWORDS``.
+            smoothing: Pseudo-count added to the denominator; a single hit on one
+                route with none on the other gives ``1 / (1 + smoothing)``.
+        """
+        self.keywords = keywords or self.DEFAULT_KEYWORDS
+        self.smoothing = smoothing
+
+    def classify(self, query: str) -> tuple[Optional[str], float]:
+        tokens = tokenize(query)
+        if "$" in query:
+            tokens.append("$")
+
+        hits = {route: sum(token in words for token in tokens) for route, words in self.keywords.items()}
+        total = sum(hits.values())
+        if total == 0:
+            return None, 0.0
+
+        route = max(hits, key=hits.get)
+        return route, hits[route] / (total + self.smoothing)
+
+
+class HashedLinearRouter:
+    """Softmax regression over hashed unigram and bigram features."""
+
+    def __init__(self, routes: Iterable[str] = ROUTES, dim: int = 2**18):
+        self.routes = list(routes)
+        self.dim = dim
+        self.weights: dict[int, list[float]] = {}
+        self.bias = [0.0] * len(self.routes)
+
+    def features(self, query: str) -> list[int]:
+        tokens = tokenize(query)
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        # crc32 is stable across processes, unlike hash()
+        return [zlib.crc32(gram.encode()) % self.dim for gram in grams]
+
+    def _probabilities(self, features: list[int]) -> list[float]:
+        scores = list(self.bias)
+        for index in features:
+            row = self.weights.get(index)
+            if row is not None:
+                for i, weight in enumerate(row):
+                    scores[i] += weight
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def classify(self, query: str) -> tuple[Optional[str], float]:
+        if not self.weights:
+            return None, 0.0
+        probabilities = self._probabilities(self.features(query))
+        best = max(range(len(self.routes)), key=probabilities.__getitem__)
+        return self.routes[best], probabilities[best]
+
+    def fit(self, examples: list[tuple[str, str]], epochs: int = 10, learning_rate: float = 0.5, l2: float = 1e-4) -> None:
+        """Train with plain SGD on (query, route) pairs."""
+        examples = [(self.features(query), self.routes.index(route)) for query, route in examples if route in self.routes]
+        rng = random.Random(0)
+
+        for _ in range(epochs):
+            rng.shuffle(examples)
+            for features, label in examples:
+                probabilities = self._probabilities(features)
+                gradient = [p - (1.0 if i == label else 0.0) for i, p in enumerate(probabilities)]
+                for i, g in enumerate(gradient):
+                    self.bias[i] -= learning_rate * g
+                for index in features:
+                    row = self.weights.setdefault(index, [0.0] * len(self.routes))
+                    for i, g in enumerate(gradient):
+                        row[i] -= learning_rate * (g + l2 * row[i])
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"routes": self.routes, "dim": self.dim, "bias": self.bias, "weights": self.weights}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLinearRouter":
+        with open(path, "r") as f:
+            data = json.load(f)
+        router = cls(data["routes"], data["dim"])
+        router.bias = data["bias"]
+        router.weights = {int(index): row for index, row in data["weights"].items()}
+        return router
+
+
+class RoutingCascade:
+    """Try local classifiers in order and fall back to the LLM below a threshold."""
+
+    def __init__(
+        self,
+        classifiers: list[Classifier],
+        threshold: float = ROUTER_THRESHOLD,
+        log_path: Optional[str] = None,
+        flush_size: int = 32,
+        flush_interval: float = 5.0,
+    ):
+        """Initialize the cascade.
+
+        Args:
+            classifiers: Local classifiers, cheapest first.
+            threshold: Minimum confidence for a local decision.
+            log_path: JSONL file that LLM decisions are appended to, for training.
+            flush_size: Buffered LLM decisions that trigger a write to ``log_path``.
+            flush_interval: Seconds after which buffered decisions are written anyway.
+        """
+        self.classifiers = classifiers
+        self.threshold = threshold
+        self.log_path = log_path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Serializes appends to the log; never held together with _lock
+        self._write_lock = threading.Lock()
+        self._counts = {"local": 0, "llm": 0}
+        self._by_classifier: dict[str, int] = {}
+        self._pending: list[str] = []
+        self._last_flush = time.monotonic()
+        if log_path:
+            atexit.register(self.flush)
+
+    def classify_locally(self, query: str) -> Optional[str]:
+        """Return a route if a local classifier is confident, otherwise None."""
+        for classifier in self.classifiers:
+            route, confidence = classifier.classify(query)
+            if route is not None and confidence >= self.threshold:
+                name = type(classifier).__name__
+                with self._lock:
+                    self._counts["local"] += 1
+                    self._by_classifier[name] = self._by_classifier.get(name, 0) + 1
+                return route
+        return None
+
+    def _buffer(self, query: str, route: str) -> bool:
+        """Count an LLM decision and buffer its log line. Returns True when a flush is due."""
+        with self._lock:
+            self._counts["llm"] += 1
+            if not self.log_path:
+                return False
+            self._pending.append(json.dumps({"query": query, "route": route}) + "\n")
+            return len(self._pending) >= self.flush_size or time.monotonic() - self._last_flush >= self.flush_interval
+
+    def record_fallback(self, query: str, route: str) -> None:
+        """Count an LLM decision and log it as a training example."""
+        if self._buffer(query, route):
+            self.flush()
+
+    async def arecord_fallback(self, query: str, route: str) -> None:
+        """Like ``record_fallback``, but writes the log from a worker thread."""
+        if self._buffer(query, route):
+            await asyncio.to_thread(self.flush)
+
+    def flush(self) -> None:
+        """Append the buffered LLM decisions to ``log_path``."""
+        with self._lock:
+            lines, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        if not lines:
+            return
+        with self._write_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            with open(self.log_path, "a") as f:
+                f.writelines(lines)
+
+    def stats(self) -> dict:
+        """Return how many requests were decided locally and by the LLM."""
+        with self._lock:
+            total = self._counts["local"] + self._counts["llm"]
+            return {
+                **self._counts,
+                "total": total,
+                "local_fraction": self._counts["local"] / total if total else 0.0,
+                "by_classifier": dict(self._by_classifier),
+            }
+
+
+def default_cascade() -> RoutingCascade:
+    """Keyword rules first, then the trained linear model if one exists."""
+    classifiers: list[Classifier] = [KeywordRouter()]
+    if os.path.exists(ROUTER_MODEL_PATH):
+        classifiers.append(HashedLinearRouter.load(ROUTER_MODEL_PATH))
+    return RoutingCascade(classifiers, log_path=ROUTER_LOG_PATH)
+
+
+def train(log_path: str = ROUTER_LOG_PATH, model_path: str = ROUTER_MODEL_PATH) -> HashedLinearRouter:
+    """Train the linear router from logged routes and save it."""
+    with open(log_path, "r") as f:
+        examples = [(row["query"], row["route"]) for row in map(json.loads, f) if row.get("route") in ROUTES]
+
+    router = HashedLinearRouter()
+    router.fit(examples)
+    router.save(model_path)
+    print(f"Trained on {len(examples)} routes, saved to {model_path}")
+    return router
+
+
+if __name__ == "__main__":
+    train(*sys.argv[1:3])
@@ -1,6 +1,8 @@
 #Define a tool
 from langchain_core.tools import tool
-from langchain.chat_models import init_chat_model
+from graph.models import get_chat_model
+from graph.instrumentation import instrument
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import MessagesState
 
@@ -9,7 +11,7 @@ class AgentState(MessagesState):
     """State for the agent"""
     
     
-llm = init_chat_model("openai:gpt-4o-mini")
+llm = get_chat_model("openai:gpt-4o-mini")
 
 @tool
 def get_current_price(product: str, location: str) -> str:
@@ -28,27 +30,39 @@ def get_current_weather(location: str) -> str:
 #Bind the tools to the llm
 llm_with_tools = llm.bind_tools(tools=[get_current_price, get_current_weather])
 
-def llm_call(state: AgentState):
-    """LLM call"""
+def llm_call_messages(state: AgentState) -> list:
+    """Build the prompt for the LLM call"""
     
     messages = state['messages']
     
     system_instruction = """You are a helpful assistant that can get the current price of a product in a specific location."""
     
-    messages = [
+    return [
         {"role": "system", "content": system_instruction}
     ] + messages
+
+
+def llm_call(state: AgentState):
+    """LLM call"""
+    
+    response = llm_with_tools.invoke(llm_call_messages(state))
+    
+    return {"messages": [response]}
+
+
+async def allm_call(state: AgentState):
+    """LLM call (async)"""
     
-    response = llm_with_tools.invoke(messages)
+    response = await llm_with_tools.ainvoke(llm_call_messages(state))
     
     return {"messages": [response]}
 
 
 graph_builder = StateGraph(AgentState)
 
-graph_builder.add_node("llm_call", llm_call)
+graph_builder.add_node("llm_call", RunnableLambda(llm_call, afunc=allm_call))
 
 graph_builder.add_edge(START, "llm_call")
 graph_builder.add_edge("llm_call", END)
 
-graph = graph_builder.compile()
+graph = instrument(graph_builder.compile(), "tools")
@@ -0,0 +1,79 @@
+"""The async node twins must let many runs share one event loop.
+
+Every graph is run with ``ScriptedChatModel``, which answers after a fixed
+latency. If a node called the model synchronously, each call would block the
+loop and N concurrent ``ainvoke`` calls would take about N times as long as
+one run; with the async twins they overlap and take about as long as one.
+
+Run from the project directory::
+
+    python -m unittest discover tests
+"""
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+import unittest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.join(os.path.dirname(PROJECT_DIR), "benchmarks")
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+# Keep the response cache and route log off disk
+os.environ.setdefault("LLM_CACHE_MEMORY_ONLY", "1")
+os.environ.setdefault("ROUTER_LOG_PATH", os.devnull)
+
+from fake_chat_model import scripted_model_factory  # noqa: E402
+from graph import models  # noqa: E402
+from graph_bench import input_builder  # noqa: E402
+
+LATENCY = 1.0
+CONCURRENT_RUNS = 200
+
+
+def load_graphs() -> dict:
+    with open(os.path.join(PROJECT_DIR, "langgraph.json")) as f:
+        specs = json.load(f)["graphs"]
+    graphs = {}
+    for name, spec in specs.items():
+        path, attr = spec.split(":")
+        module = importlib.import_module(os.path.splitext(path)[0].replace("/", "."))
+        graphs[name] = getattr(module, attr)
+    return graphs
+
+
+async def timed_runs(graph, inputs: list) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(graph.ainvoke(graph_input) for graph_input in inputs))
+    return time.perf_counter() - start
+
+
+class AsyncConcurrencyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Must be in place before the graph modules build their models
+        models.set_model_factory(scripted_model_factory(LATENCY, 8))
+        cls.graphs = load_graphs()
+
+    @classmethod
+    def tearDownClass(cls):
+        models.set_model_factory(None)
+
+    def test_concurrent_runs_take_about_one_run(self):
+        for name, graph in self.graphs.items():
+            with self.subTest(graph=name):
+                build_input = input_builder(graph)
+                # Unique inputs, so the response cache cannot answer for the model
+                one_run = asyncio.run(timed_runs(graph, [build_input(0)]))
+                inputs = [build_input(i) for i in range(1, CONCURRENT_RUNS + 1)]
+                concurrent = asyncio.run(timed_runs(graph, inputs))
+
+                # Blocking nodes would take about CONCURRENT_RUNS * one_run
+                self.assertLess(concurrent, 3 * one_run, f"{CONCURRENT_RUNS} runs took {concurrent:.2f}s, one took {one_run:.2f}s")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
+from memo import MemoizedTools
 
 load_dotenv("../.env")
 
@@ -10,9 +11,12 @@ mcp = FastMCP(
     port=8050,  # only used for SSE transport (set this to any port)
 )
 
+# Results of pure tools are reused for repeated arguments; see the cache_stats tool
+memo = MemoizedTools(mcp, maxsize=1024)
 
-# Add a simple calculator tool
-@mcp.tool()
+
+# Add a simple calculator tool (pure, so its results can be memoized)
+@memo.tool()
 def add(a: int, b: int) -> int:
     """Add two numbers together"""
     return a + b
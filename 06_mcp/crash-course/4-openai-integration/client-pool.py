@@ -0,0 +1,215 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp import ClientSession, StdioServerParameters, types
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+
+from client import MCPOpenAIClient
+
+# Separates the server name from the tool name in the merged catalog
+NAMESPACE_SEPARATOR = "__"
+
+
+class PooledSession:
+    """One MCP session, owned by a background task for its whole life.
+
+    The stdio/SSE transports are anyio context managers that must be exited by
+    the task that entered them, so each session runs in its own task and is
+    closed by signalling that task.
+    """
+
+    def __init__(self, server: str, config: Dict[str, Any], max_in_flight: int, message_handler: Any):
+        self.server = server
+        self.config = config
+        self.in_flight = 0
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.session: Optional[ClientSession] = None
+        self._message_handler = message_handler
+        self._ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def _transport(self):
+        if "url" in self.config:
+            return sse_client(self.config["url"])
+        return stdio_client(
+            StdioServerParameters(
+                command=self.config.get("command", "python"),
+                args=self.config.get("args", []),
+                env=self.config.get("env"),
+            )
+        )
+
+    async def _run(self):
+        try:
+            async with self._transport() as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream, message_handler=self._message_handler) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set_result(session)
+                    await self._stop.wait()
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+
+    async def wait_ready(self) -> ClientSession:
+        return await self._ready
+
+    async def close(self):
+        self._stop.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+class MCPPoolClient(MCPOpenAIClient):
+    """OpenAI client over several MCP servers with a bounded pool of sessions each.
+
+    Tools from all servers are merged into one catalog, namespaced as
+    `<server>__<tool>`, and each call is routed to a session of the server that
+    owns the tool. Sessions are shared by all concurrent `process_query` and
+    `stream_query` calls: a call goes to the server's least busy session, and a
+    session has at most `max_in_flight` requests outstanding.
+    """
+
+    def __init__(
+        self,
+        servers: Dict[str, Dict[str, Any]],
+        model: str = "gpt-4o",
+        sessions_per_server: int = 2,
+        max_in_flight: int = 16,
+        **kwargs: Any,
+    ):
+        """Initialize the pooled client.
+
+        Args:
+            servers: Server name -> config. A config has either `url` (SSE) or
+                `command`/`args`/`env` (stdio), e.g.
+                {"kb": {"command": "python", "args": ["server.py"]},
+                 "calc": {"url": "http://localhost:8050/sse"}}.
+            model: The OpenAI model to use.
+            sessions_per_server: Number of sessions opened to each server.
+            max_in_flight: Maximum concurrent requests on one session.
+            **kwargs: Passed to MCPOpenAIClient (tools_ttl, max_concurrent_tools, ...).
+        """
+        kwargs.setdefault("max_concurrent_tools", sessions_per_server * max_in_flight * max(len(servers), 1))
+        super().__init__(model=model, **kwargs)
+        self.servers = servers
+        self.sessions_per_server = sessions_per_server
+        self.max_in_flight = max_in_flight
+        self.pools: Dict[str, List[PooledSession]] = {}
+        # Namespaced tool name -> (server, tool name on that server)
+        self._routes: Dict[str, Tuple[str, str]] = {}
+        self._catalog_lock = asyncio.Lock()
+
+    async def connect(self):
+        """Open every session to every server in parallel and load the tool catalog."""
+        for server, config in self.servers.items():
+            self.pools[server] = [
+                PooledSession(server, config, self.max_in_flight, self._handle_message)
+                for _ in range(self.sessions_per_server)
+            ]
+
+        sessions = [session for pool in self.pools.values() for session in pool]
+        results = await asyncio.gather(*(session.wait_ready() for session in sessions), return_exceptions=True)
+        failed = [(session.server, error) for session, error in zip(sessions, results) if isinstance(error, BaseException)]
+        if failed:
+            await self.cleanup()
+            server, error = failed[0]
+            raise ConnectionError(f"Could not connect to MCP server {server!r}: {error}") from error
+
+        tools = await self.get_mcp_tools()
+        print(f"\nConnected to {len(self.servers)} servers with tools:")
+        for tool in tools:
+            print(f"  - {tool['function']['name']}: {tool['function']['description']}")
+
+    async def connect_to_server(self, server_script_path: str = "server.py"):
+        """Connect using the configured servers (the argument is ignored)."""
+        await self.connect()
+
+    def _tools_expired(self) -> bool:
+        return self.tools_ttl is not None and time.monotonic() - self._tools_cached_at > self.tools_ttl
+
+    async def get_mcp_tools(self) -> List[Dict[str, Any]]:
+        """Get the merged, namespaced tool catalog of all servers in OpenAI format."""
+        if self._tools_cache is not None and not self._tools_expired():
+            return self._tools_cache
+
+        async with self._catalog_lock:
+            # Another caller may have refreshed the catalog while we waited for the lock
+            if self._tools_cache is not None and not self._tools_expired():
+                return self._tools_cache
+
+            servers = list(self.pools)
+            results = await asyncio.gather(*(self.pools[server][0].session.list_tools() for server in servers))
+
+            tools, routes = [], {}
+            for server, tools_result in zip(servers, results):
+                for tool in tools_result.tools:
+                    name = f"{server}{NAMESPACE_SEPARATOR}{tool.name}"
+                    routes[name] = (server, tool.name)
+                    tools.append(
+                        {
+                            "type": "function",
+                            "function": {
+                                "name": name,
+                                "description": f"[{server}] {tool.description or ''}",
+                                "parameters": tool.inputSchema,
+                            },
+                        }
+                    )
+
+            self._routes = routes
+            self._tools_cache = tools
+            self._tools_cached_at = time.monotonic()
+            return tools
+
+    async def _call_mcp_tool(self, name: str, arguments: Dict[str, Any]) -> types.CallToolResult:
+        """Route a namespaced tool call to the least busy session of its server."""
+        if name not in self._routes:
+            raise ValueError(f"Unknown tool: {name}")
+        server, tool_name = self._routes[name]
+
+        session = min(self.pools[server], key=lambda pooled: pooled.in_flight)
+        session.in_flight += 1
+        try:
+            async with session.semaphore:
+                return await session.session.call_tool(tool_name, arguments=arguments)
+        finally:
+            session.in_flight -= 1
+
+    async def cleanup(self):
+        """Close every session."""
+        await asyncio.gather(*(session.close() for pool in self.pools.values() for session in pool))
+        self.pools = {}
+        await super().cleanup()
+
+
+async def main():
+    """Main entry point for the client."""
+    client = MCPPoolClient(
+        {
+            "kb": {"command": "python", "args": ["server.py"]},
+            # Start ../3-simple-server-setup/server.py with SSE transport to add its tools:
+            # "calc": {"url": "http://localhost:8050/sse"},
+        }
+    )
+    await client.connect()
+
+    # Many conversations share the same few sessions
+    queries = [
+        "What is our company's vacation policy?",
+        "How do I request a new software license?",
+        "What is our remote work policy?",
+    ]
+    responses = await asyncio.gather(*(client.process_query(query) for query in queries))
+    for query, response in zip(queries, responses):
+        print(f"\nQuery: {query}\nResponse: {response}")
+
+    await client.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
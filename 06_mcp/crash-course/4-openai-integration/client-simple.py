@@ -1,11 +1,12 @@
 import asyncio
 import json
+import time
 from contextlib import AsyncExitStack
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import nest_asyncio
 from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters
+from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 from openai import AsyncOpenAI
 
@@ -23,6 +24,12 @@ model = "gpt-4o"
 stdio = None
 write = None
 
+# Tools in OpenAI format, reused until the server says they changed
+# (or tools_ttl seconds pass, if set)
+tools_cache: Optional[List[Dict[str, Any]]] = None
+tools_cached_at = 0.0
+tools_ttl: Optional[float] = None
+
 
 async def connect_to_server(server_script_path: str = "server.py"):
     """Connect to an MCP server.
@@ -41,28 +48,36 @@ async def connect_to_server(server_script_path: str = "server.py"):
     # Connect to the server
     stdio_transport = await exit_stack.enter_async_context(stdio_client(server_params))
     stdio, write = stdio_transport
-    session = await exit_stack.enter_async_context(ClientSession(stdio, write))
+    session = await exit_stack.enter_async_context(
+        ClientSession(stdio, write, message_handler=handle_message)
+    )
 
     # Initialize the connection
     await session.initialize()
 
     # List available tools
     tools_result = await session.list_tools()
+    cache_tools(tools_result)
     print("\nConnected to server with tools:")
     for tool in tools_result.tools:
         print(f"  - {tool.name}: {tool.description}")
 
 
-async def get_mcp_tools() -> List[Dict[str, Any]]:
-    """Get available tools from the MCP server in OpenAI format.
+async def handle_message(message: Any) -> None:
+    """Drop the cached tool list when the server says its tools changed."""
+    global tools_cache
 
-    Returns:
-        A list of tools in OpenAI format.
-    """
-    global session
+    if isinstance(message, types.ServerNotification) and isinstance(
+        message.root, types.ToolListChangedNotification
+    ):
+        tools_cache = None
 
-    tools_result = await session.list_tools()
-    return [
+
+def cache_tools(tools_result: types.ListToolsResult) -> List[Dict[str, Any]]:
+    """Convert MCP tools to OpenAI format and cache them."""
+    global tools_cache, tools_cached_at
+
+    tools_cache = [
         {
             "type": "function",
             "function": {
@@ -73,6 +88,24 @@ async def get_mcp_tools() -> List[Dict[str, Any]]:
         }
         for tool in tools_result.tools
     ]
+    tools_cached_at = time.monotonic()
+    return tools_cache
+
+
+async def get_mcp_tools() -> List[Dict[str, Any]]:
+    """Get available tools from the MCP server in OpenAI format.
+
+    The converted list is cached, so most queries skip the list_tools round-trip.
+
+    Returns:
+        A list of tools in OpenAI format.
+    """
+    global session, tools_cache, tools_cached_at, tools_ttl
+
+    expired = tools_ttl is not None and time.monotonic() - tools_cached_at > tools_ttl
+    if tools_cache is None or expired:
+        cache_tools(await session.list_tools())
+    return tools_cache
 
 
 async def process_query(query: str) -> str:
@@ -1,13 +1,16 @@
 import asyncio
 import json
+import time
 from contextlib import AsyncExitStack
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import nest_asyncio
 from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters
+from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
 
 # Apply nest_asyncio to allow nested event loops (needed for Jupyter/IPython)
 nest_asyncio.apply()
@@ -19,11 +22,21 @@ load_dotenv("../.env")
 class MCPOpenAIClient:
     """Client for interacting with OpenAI models using MCP tools."""
 
-    def __init__(self, model: str = "gpt-4o"):
+    def __init__(
+        self,
+        model: str = "gpt-4o",
+        tools_ttl: Optional[float] = None,
+        max_concurrent_tools: int = 8,
+        tool_timeout: Optional[float] = 30.0,
+    ):
         """Initialize the OpenAI MCP client.
 
         Args:
             model: The OpenAI model to use.
+            tools_ttl: Seconds to reuse the tool list before fetching it again. By
+                default it is reused until the server reports that its tools changed.
+            max_concurrent_tools: Maximum number of tool calls in flight at once.
+            tool_timeout: Seconds a single tool call may take (None for no limit).
         """
         # Initialize session and client objects
         self.session: Optional[ClientSession] = None
@@ -32,6 +45,11 @@ class MCPOpenAIClient:
         self.model = model
         self.stdio: Optional[Any] = None
         self.write: Optional[Any] = None
+        self.tools_ttl = tools_ttl
+        self._tools_cache: Optional[List[Dict[str, Any]]] = None
+        self._tools_cached_at = 0.0
+        self.tool_timeout = tool_timeout
+        self._tool_semaphore = asyncio.Semaphore(max_concurrent_tools)
 
     async def connect_to_server(self, server_script_path: str = "server.py"):
         """Connect to an MCP server.
@@ -51,7 +69,7 @@ class MCPOpenAIClient:
         )
         self.stdio, self.write = stdio_transport
         self.session = await self.exit_stack.enter_async_context(
-            ClientSession(self.stdio, self.write)
+            ClientSession(self.stdio, self.write, message_handler=self._handle_message)
         )
 
         # Initialize the connection
@@ -59,18 +77,25 @@ class MCPOpenAIClient:
 
         # List available tools
         tools_result = await self.session.list_tools()
+        self._cache_tools(tools_result)
         print("\nConnected to server with tools:")
         for tool in tools_result.tools:
             print(f"  - {tool.name}: {tool.description}")
 
-    async def get_mcp_tools(self) -> List[Dict[str, Any]]:
-        """Get available tools from the MCP server in OpenAI format.
+    async def _handle_message(self, message: Any) -> None:
+        """Drop the cached tool list when the server says its tools changed."""
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            self.invalidate_tools_cache()
 
-        Returns:
-            A list of tools in OpenAI format.
-        """
-        tools_result = await self.session.list_tools()
-        return [
+    def invalidate_tools_cache(self):
+        """Fetch the tool list from the server again on the next query."""
+        self._tools_cache = None
+
+    def _cache_tools(self, tools_result: types.ListToolsResult) -> List[Dict[str, Any]]:
+        """Convert MCP tools to OpenAI format and cache them."""
+        self._tools_cache = [
             {
                 "type": "function",
                 "function": {
@@ -81,6 +106,56 @@ class MCPOpenAIClient:
             }
             for tool in tools_result.tools
         ]
+        self._tools_cached_at = time.monotonic()
+        return self._tools_cache
+
+    async def get_mcp_tools(self) -> List[Dict[str, Any]]:
+        """Get available tools from the MCP server in OpenAI format.
+
+        The converted list is cached, so most queries skip the list_tools round-trip.
+
+        Returns:
+            A list of tools in OpenAI format.
+        """
+        expired = (
+            self.tools_ttl is not None
+            and time.monotonic() - self._tools_cached_at > self.tools_ttl
+        )
+        if self._tools_cache is None or expired:
+            self._cache_tools(await self.session.list_tools())
+        return self._tools_cache
+
+    async def _call_mcp_tool(self, name: str, arguments: Dict[str, Any]) -> types.CallToolResult:
+        """Send one tool call to the MCP server."""
+        return await self.session.call_tool(name, arguments=arguments)
+
+    async def call_tool(self, tool_call: Any) -> Dict[str, Any]:
+        """Execute one tool call and return it as a tool message.
+
+        Failures (bad arguments, timeouts, tool errors) are returned as the
+        message content, so the model can see them instead of the query failing.
+
+        Args:
+            tool_call: A tool call from an OpenAI assistant message.
+
+        Returns:
+            A tool message for the conversation.
+        """
+        name = tool_call.function.name
+        try:
+            arguments = json.loads(tool_call.function.arguments or "{}")
+            async with self._tool_semaphore:
+                result = await asyncio.wait_for(
+                    self._call_mcp_tool(name, arguments),
+                    self.tool_timeout,
+                )
+            content = result.content[0].text if result.content else ""
+        except asyncio.TimeoutError:
+            content = f"Error: tool {name} timed out after {self.tool_timeout} seconds"
+        except Exception as e:
+            content = f"Error: tool {name} failed: {str(e)}"
+
+        return {"role": "tool", "tool_call_id": tool_call.id, "content": content}
 
     async def process_query(self, query: str) -> str:
         """Process a query using OpenAI and available MCP tools.
@@ -113,22 +188,13 @@ class MCPOpenAIClient:
 
         # Handle tool calls if present
         if assistant_message.tool_calls:
-            # Process each tool call
-            for tool_call in assistant_message.tool_calls:
-                # Execute tool call
-                result = await self.session.call_tool(
-                    tool_call.function.name,
-                    arguments=json.loads(tool_call.function.arguments),
-                )
+            # Execute tool calls concurrently; gather keeps the tool_call order
+            tool_messages = await asyncio.gather(
+                *(self.call_tool(tool_call) for tool_call in assistant_message.tool_calls)
+            )
 
-                # Add tool response to conversation
-                messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": result.content[0].text,
-                    }
-                )
+            # Add tool responses to conversation
+            messages.extend(tool_messages)
 
             # Get final response from OpenAI with tool results
             final_response = await self.openai_client.chat.completions.create(
@@ -143,6 +209,95 @@ class MCPOpenAIClient:
         # No tool calls, just return the direct response
         return assistant_message.content
 
+    async def stream_query(self, query: str, max_rounds: int = 5) -> AsyncIterator[Dict[str, Any]]:
+        """Answer a query with as many tool rounds as needed, streaming as it goes.
+
+        Assistant tokens are yielded as they arrive, and each tool call starts as
+        soon as its arguments have finished streaming, while the model is still
+        streaming the next one. Yields dicts of four kinds:
+        - {"type": "token", "content": ...} for each streamed token
+        - {"type": "tool_call", "name": ..., "arguments": ...} when a tool call starts
+        - {"type": "tool_result", "name": ..., "content": ...} when a tool call finishes
+        - {"type": "done", "content": ...} with the full final answer
+
+        Args:
+            query: The user query.
+            max_rounds: Maximum number of tool rounds before the model must answer.
+        """
+        tools = await self.get_mcp_tools()
+        messages: List[Any] = [{"role": "user", "content": query}]
+        tasks: Dict[int, asyncio.Task] = {}
+
+        try:
+            for round_number in range(max_rounds + 1):
+                stream = await self.openai_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    tools=tools,
+                    # Out of rounds: the model has to answer with what it has
+                    tool_choice="none" if round_number == max_rounds else "auto",
+                    stream=True,
+                )
+
+                content_parts: List[str] = []
+                tool_calls: Dict[int, ChatCompletionMessageToolCall] = {}
+                tasks = {}
+
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield {"type": "token", "content": delta.content}
+
+                    for tool_call_delta in delta.tool_calls or []:
+                        # A new tool call means the previous ones are fully streamed
+                        for index, tool_call in tool_calls.items():
+                            if index < tool_call_delta.index and index not in tasks:
+                                tasks[index] = asyncio.create_task(self.call_tool(tool_call))
+                                yield {"type": "tool_call", "name": tool_call.function.name, "arguments": tool_call.function.arguments}
+
+                        tool_call = tool_calls.setdefault(
+                            tool_call_delta.index,
+                            ChatCompletionMessageToolCall(id="", type="function", function=Function(name="", arguments="")),
+                        )
+                        if tool_call_delta.id:
+                            tool_call.id = tool_call_delta.id
+                        if tool_call_delta.function and tool_call_delta.function.name:
+                            tool_call.function.name += tool_call_delta.function.name
+                        if tool_call_delta.function and tool_call_delta.function.arguments:
+                            tool_call.function.arguments += tool_call_delta.function.arguments
+
+                content = "".join(content_parts)
+                if not tool_calls:
+                    yield {"type": "done", "content": content}
+                    return
+
+                for index, tool_call in tool_calls.items():
+                    if index not in tasks:
+                        tasks[index] = asyncio.create_task(self.call_tool(tool_call))
+                        yield {"type": "tool_call", "name": tool_call.function.name, "arguments": tool_call.function.arguments}
+
+                messages.append(
+                    {
+                        "role": "assistant",
+                        "content": content or None,
+                        "tool_calls": [tool_calls[index].model_dump() for index in sorted(tool_calls)],
+                    }
+                )
+
+                # Tool messages go back in tool_call order
+                for index in sorted(tool_calls):
+                    tool_message = await tasks[index]
+                    messages.append(tool_message)
+                    yield {"type": "tool_result", "name": tool_calls[index].function.name, "content": tool_message["content"]}
+        finally:
+            # The consumer may stop iterating early; don't leave tool calls running
+            for task in tasks.values():
+                task.cancel()
+
     async def cleanup(self):
         """Clean up resources."""
         await self.exit_stack.aclose()
@@ -0,0 +1,155 @@
+import contextlib
+import glob
+import os
+import re
+import zlib
+from typing import List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class Embedder(Protocol):
+    """Anything that turns texts into fixed-size float32 vectors."""
+
+    name: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return an (len(texts), dim) float32 array of L2-normalized rows."""
+        ...
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and character trigrams.
+
+    Needs no model or network. Character trigrams give some robustness to
+    inflections and paraphrases ("vacation" / "vacations").
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD_RE.findall(text.lower())
+        grams = [f"w:{word}" for word in words]
+        for word in words:
+            padded = f"#{word}#"
+            grams.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return grams
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for gram in self._features(text):
+                # crc32 is stable across processes, unlike hash()
+                digest = zlib.crc32(gram.encode())
+                vectors[row, digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        return _normalize(vectors)
+
+
+class RandomProjectionEmbedder:
+    """Project wide hashed features down to `dim` with a seeded Gaussian matrix."""
+
+    def __init__(self, dim: int = 256, input_dim: int = 4096, seed: int = 0):
+        self.dim = dim
+        self.name = f"projection-{input_dim}x{dim}-{seed}"
+        self._hashing = HashingEmbedder(input_dim)
+        rng = np.random.default_rng(seed)
+        self._projection = (rng.standard_normal((input_dim, dim)) / np.sqrt(dim)).astype(np.float32)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return _normalize(self._hashing.embed(texts) @ self._projection)
+
+
+EMBEDDERS = {
+    "hashing": HashingEmbedder,
+    "projection": RandomProjectionEmbedder,
+}
+
+
+def get_embedder(name: Optional[str] = None, dim: Optional[int] = None) -> Embedder:
+    """Build a local embedder by name (defaults from KB_EMBEDDER / KB_EMBEDDING_DIM)."""
+    name = name or os.getenv("KB_EMBEDDER", "hashing")
+    dim = dim or int(os.getenv("KB_EMBEDDING_DIM", "256"))
+    return EMBEDDERS[name](dim=dim)
+
+
+class EmbeddingMatrix:
+    """Read-only, memory-mapped float32 matrix of entry embeddings.
+
+    The file name includes the embedder, a hash of the knowledge base path and
+    a hash of its contents, so every server process on the machine maps the
+    same file and shares its pages through the OS page cache instead of
+    holding its own copy.
+    """
+
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self._matrix = np.memmap(path, dtype=np.float32, mode="r").reshape(-1, dim)
+
+    def __len__(self) -> int:
+        return self._matrix.shape[0]
+
+    @classmethod
+    def open_or_build(
+        cls, cache_dir: str, source: str, key: str, texts: Sequence[str], embedder: Embedder
+    ) -> "EmbeddingMatrix":
+        """Map the matrix for `key`, embedding `texts` and writing it first if needed.
+
+        After a rebuild, older matrices of the same `source` and embedder are
+        deleted; other sources sharing `cache_dir` are left alone.
+
+        Args:
+            cache_dir: Directory holding the matrix files.
+            source: Identifies what is embedded, e.g. a hash of the file path.
+            key: Identifies the contents being embedded, e.g. the file hash.
+            texts: One text per row.
+            embedder: Embedder used for the rows.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        prefix = os.path.join(cache_dir, f"{embedder.name}-{source}-")
+        path = f"{prefix}{key}.f32"
+
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            rows = np.memmap(tmp_path, dtype=np.float32, mode="w+", shape=(len(texts), embedder.dim))
+            for start in range(0, len(texts), 1024):
+                rows[start:start + 1024] = embedder.embed(texts[start:start + 1024])
+            rows.flush()
+            del rows
+            # Atomic, so a concurrent process never maps a half-written file
+            os.replace(tmp_path, path)
+
+            # Mapped pages of removed files stay valid for processes still using them
+            for stale in glob.glob(f"{prefix}*.f32"):
+                if stale != path:
+                    with contextlib.suppress(OSError):
+                        os.remove(stale)
+
+        return cls(path, embedder.dim)
+
+    def top_k(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Return up to k (row, cosine similarity) pairs, best first.
+
+        This is an exact scan: it reads the whole matrix, so its cost is bound
+        by memory bandwidth (about 12 ms for 100k rows of 256 floats on one
+        core), not by the partial sort.
+        """
+        if len(self) == 0 or k <= 0:
+            return []
+
+        # One matrix-vector product over all rows, then a linear-time partial sort
+        scores = self._matrix @ query
+        k = min(k, len(scores))
+        best = np.argpartition(scores, len(scores) - k)[-k:]
+        best = best[np.argsort(-scores[best])]
+        return [(int(row), float(scores[row])) for row in best]
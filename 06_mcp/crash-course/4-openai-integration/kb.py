@@ -0,0 +1,358 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import Embedder, EmbeddingMatrix
+from search import BM25Index, bm25_scan
+
+
+def parse_entry(item: Any, number: int) -> Tuple[str, str]:
+    """Return (question, answer) for one knowledge base item."""
+    if isinstance(item, dict):
+        return item.get("question", "Unknown question"), item.get("answer", "Unknown answer")
+    return f"Item {number}", str(item)
+
+
+class KnowledgeBase:
+    """In-memory copy of the knowledge base file, reloaded only when the file changes.
+
+    Every access stats the file. A changed mtime, size or inode triggers a hash
+    of the contents, and only a changed hash triggers a re-parse. The formatted
+    text returned by `get_knowledge_base` is built once per version of the file,
+    and the BM25 index behind `search` is updated with only the entries that
+    were added or removed. `semantic_search` embeds the entries lazily, once per
+    version of the file, into a memory-mapped matrix under `cache_dir`.
+    """
+
+    def __init__(self, path: str, embedder: Optional[Embedder] = None, cache_dir: Optional[str] = None):
+        """Initialize the knowledge base.
+
+        Args:
+            path: Path to the JSON knowledge base file.
+            embedder: Embedder for `semantic_search`. Required only for that method.
+            cache_dir: Where embedding matrices are stored. Defaults to `.cache`
+                next to the knowledge base file.
+        """
+        self.path = path
+        self.embedder = embedder
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), ".cache")
+        self._lock = threading.Lock()
+        self._stat: Optional[Tuple[int, int, int]] = None
+        self._digest: Optional[str] = None
+        self._entries: List[Tuple[str, str]] = []
+        self._text = ""
+        self._version = 0
+        self._index = BM25Index()
+        # Index doc id -> position of the entry in the file
+        self._positions: Dict[Tuple[str, int], int] = {}
+        self._matrix: Optional[EmbeddingMatrix] = None
+        self._matrix_version = 0
+        # Knowledge bases can share a cache_dir; their matrices are told apart by path
+        self._source = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+
+    def refresh(self) -> bool:
+        """Reload the file if it changed since the last load.
+
+        Returns:
+            True if the contents changed and were reloaded.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            json.JSONDecodeError: If the file is not valid JSON.
+        """
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if signature == self._stat:
+            return False
+
+        with self._lock:
+            if signature == self._stat:
+                return False
+
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+
+            if digest != self._digest:
+                # Parse before touching any state, so a bad edit leaves nothing half-loaded
+                data = json.loads(raw)
+                self._entries, self._text = self._build(data)
+                self._sync_index()
+                self._digest = digest
+                self._version += 1
+                changed = True
+            else:
+                changed = False
+
+            self._stat = signature
+            return changed
+
+    @staticmethod
+    def _build(data: Any) -> Tuple[List[Tuple[str, str]], str]:
+        """Turn parsed JSON into (question, answer) pairs and the formatted text."""
+        entries = []
+        parts = ["Here is the retrieved knowledge base:\n\n"]
+
+        if isinstance(data, list):
+            for i, item in enumerate(data, 1):
+                question, answer = parse_entry(item, i)
+                entries.append((question, answer))
+                parts.append(f"Q{i}: {question}\nA{i}: {answer}\n\n")
+        else:
+            parts.append(f"Knowledge base content: {json.dumps(data, indent=2)}\n\n")
+
+        return entries, "".join(parts)
+
+    def _sync_index(self) -> None:
+        """Bring the search index in line with the current entries."""
+        # Entries are identified by content (plus occurrence, for duplicates), so
+        # reordering or inserting entries does not re-index the unchanged ones
+        occurrences: Counter = Counter()
+        positions = {}
+        for position, (question, answer) in enumerate(self._entries):
+            digest = hashlib.sha1(f"{question}\0{answer}".encode()).hexdigest()
+            positions[(digest, occurrences[digest])] = position
+            occurrences[digest] += 1
+
+        for doc_id in self._positions.keys() - positions.keys():
+            self._index.remove(doc_id)
+        for doc_id in positions.keys() - self._positions.keys():
+            question, answer = self._entries[positions[doc_id]]
+            self._index.add(doc_id, f"{question} {answer}")
+
+        self._positions = positions
+
+    @property
+    def version(self) -> int:
+        """Number of distinct file contents loaded so far."""
+        return self._version
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._entries)
+
+    def page(self, start: int, limit: int) -> List[Tuple[int, str, str]]:
+        """Return entries start..start+limit as (number, question, answer)."""
+        self.refresh()
+        entries = self._entries
+        return [(i + 1, *entries[i]) for i in range(start, min(start + limit, len(entries)))]
+
+    def entries(self) -> List[Tuple[str, str]]:
+        """Return the current (question, answer) pairs."""
+        self.refresh()
+        return self._entries
+
+    def formatted(self) -> str:
+        """Return the whole knowledge base as a formatted string."""
+        self.refresh()
+        return self._text
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, str, str]]:
+        """Return the k best matching entries as (number, question, answer), best first.
+
+        Numbers are 1-based positions in the file, matching `formatted`.
+        """
+        self.refresh()
+        with self._lock:
+            hits = self._index.search(query, k)
+            return [(self._positions[doc_id] + 1, *self._entries[self._positions[doc_id]]) for doc_id, _ in hits]
+
+    def semantic_search(self, query: str, k: int = 3) -> List[Tuple[int, str, str]]:
+        """Like `search`, but ranks entries by embedding cosine similarity."""
+        if self.embedder is None:
+            raise ValueError("semantic_search needs an embedder")
+
+        self.refresh()
+        with self._lock:
+            if not self._entries:
+                return []
+            if self._matrix_version != self._version:
+                texts = [f"{question} {answer}" for question, answer in self._entries]
+                self._matrix = EmbeddingMatrix.open_or_build(
+                    self.cache_dir, self._source, self._digest[:16], texts, self.embedder
+                )
+                self._matrix_version = self._version
+            entries, matrix = self._entries, self._matrix
+
+        hits = matrix.top_k(self.embedder.embed([query])[0], k)
+        return [(row + 1, *entries[row]) for row, _ in hits]
+
+
+class JsonlKnowledgeBase:
+    """Knowledge base stored as JSONL (one Q&A object per line), read on demand.
+
+    A sidecar index (`<path>.idx`) holds the byte offset of every line, so an
+    entry is read with one seek and opening the knowledge base costs the same
+    regardless of its size: the index is memory-mapped, not loaded. When the
+    file grows by appending, only the new lines are indexed; any other change
+    rebuilds the index.
+    """
+
+    # magic, crc32 of the last indexed line, indexed bytes, source mtime_ns
+    _HEADER = struct.Struct("<4sIQQ")
+    _MAGIC = b"KBX1"
+
+    def __init__(self, path: str, index_path: Optional[str] = None):
+        """Initialize the knowledge base.
+
+        Args:
+            path: Path to the JSONL knowledge base file.
+            index_path: Path of the offset index. Defaults to `<path>.idx`.
+        """
+        self.path = path
+        self.index_path = index_path or f"{path}.idx"
+        self._lock = threading.Lock()
+        self._stat: Optional[Tuple[int, int, int]] = None
+        self._offsets: np.ndarray = np.zeros(0, dtype="<u8")
+
+    def refresh(self) -> bool:
+        """Bring the offset index up to date with the file.
+
+        Returns:
+            True if the index changed.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if signature == self._stat:
+            return False
+
+        with self._lock:
+            if signature == self._stat:
+                return False
+
+            header = self._read_header()
+            if header is None or header[3] != stat.st_mtime_ns or header[2] != stat.st_size:
+                self._update_index(header, stat)
+            self._offsets = self._map_offsets()
+            self._stat = signature
+            return True
+
+    def _read_header(self) -> Optional[Tuple[bytes, int, int, int]]:
+        try:
+            with open(self.index_path, "rb") as f:
+                header = self._HEADER.unpack(f.read(self._HEADER.size))
+        except (FileNotFoundError, struct.error):
+            return None
+        return header if header[0] == self._MAGIC else None
+
+    def _map_offsets(self) -> np.ndarray:
+        if os.path.getsize(self.index_path) == self._HEADER.size:
+            return np.zeros(0, dtype="<u8")
+        return np.memmap(self.index_path, dtype="<u8", mode="r", offset=self._HEADER.size)
+
+    def _update_index(self, header: Optional[Tuple[bytes, int, int, int]], stat: os.stat_result) -> None:
+        """Extend the index over appended lines, or rebuild it."""
+        with open(self.path, "rb") as f:
+            start, base = 0, np.zeros(0, dtype="<u8")
+            if header is not None and header[2] < stat.st_size:
+                old = self._map_offsets()
+                last = int(old[-1]) if len(old) else 0
+                f.seek(last)
+                tail = f.read(header[2] - last)
+                # Unchanged, newline-terminated last line: the file was only appended to
+                if zlib.crc32(tail) == header[1] and (not tail or tail.endswith(b"\n")):
+                    start, base = header[2], np.array(old)
+                del old
+
+            f.seek(start)
+            position, offsets = start, []
+            for line in f:
+                if line.strip():
+                    offsets.append(position)
+                position += len(line)
+
+            last = offsets[-1] if offsets else int(base[-1]) if len(base) else 0
+            f.seek(last)
+            tail_crc = zlib.crc32(f.read(position - last))
+
+        # Write to a temp file and swap it in, so readers never see a partial index
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(self._HEADER.pack(self._MAGIC, tail_crc, position, stat.st_mtime_ns))
+            out.write(base.tobytes())
+            out.write(np.asarray(offsets, dtype="<u8").tobytes())
+        os.replace(tmp_path, self.index_path)
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._offsets)
+
+    def page(self, start: int, limit: int) -> List[Tuple[int, str, str]]:
+        """Return entries start..start+limit as (number, question, answer).
+
+        Raises:
+            json.JSONDecodeError: If a line in the page is not valid JSON.
+        """
+        self.refresh()
+        offsets = self._offsets
+        stop = min(start + limit, len(offsets))
+        results = []
+        with open(self.path, "rb") as f:
+            for i in range(start, stop):
+                f.seek(int(offsets[i]))
+                results.append((i + 1, *parse_entry(json.loads(f.readline()), i + 1)))
+        return results
+
+    def _read(self, number: int) -> Tuple[int, str, str]:
+        """Read entry `number` (1-based) with one seek."""
+        with open(self.path, "rb") as f:
+            f.seek(int(self._offsets[number - 1]))
+            return (number, *parse_entry(json.loads(f.readline()), number))
+
+    def _scan(self) -> Iterator[Tuple[int, str, str]]:
+        """Yield (number, question, answer) for every indexed entry, in file order."""
+        count = len(self._offsets)
+        if not count:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(int(self._offsets[0]))
+            number = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                number += 1
+                yield (number, *parse_entry(json.loads(line), number))
+                if number == count:
+                    return
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, str, str]]:
+        """Return the k best matching entries as (number, question, answer), best first.
+
+        There is no inverted index for JSONL files: each search is one
+        sequential pass over the file, scored with BM25 as it is read, and the
+        hits are then read back by offset.
+
+        Raises:
+            json.JSONDecodeError: If a line is not valid JSON.
+        """
+        self.refresh()
+        documents = ((number, f"{question} {answer}") for number, question, answer in self._scan())
+        hits = bm25_scan(query, documents, k)
+        return [self._read(number) for number, _ in hits]
+
+    def semantic_search(self, query: str, k: int = 3) -> List[Tuple[int, str, str]]:
+        raise ValueError("semantic search needs a JSON knowledge base, use keyword search for JSONL files")
+
+
+def open_knowledge_base(path: str, embedder: Optional[Embedder] = None):
+    """Open a `.jsonl` file as a JsonlKnowledgeBase, anything else as a KnowledgeBase."""
+    if path.endswith(".jsonl"):
+        return JsonlKnowledgeBase(path)
+    return KnowledgeBase(path, embedder=embedder)
+
+
+if __name__ == "__main__":
+    # Build the offset index ahead of time: python kb.py data/kb.jsonl
+    kb = JsonlKnowledgeBase(sys.argv[1])
+    print(f"Indexed {len(kb)} entries in {kb.index_path}")
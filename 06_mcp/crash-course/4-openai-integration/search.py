@@ -0,0 +1,131 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens."""
+    return _WORD_RE.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index that supports adding and removing documents.
+
+    Documents are identified by any hashable id. Updates touch only the postings
+    of the changed documents, so keeping the index in sync with a file that
+    changed a little is cheap.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize the index.
+
+        Args:
+            k1: Term frequency saturation.
+            b: Document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._terms: Dict[Hashable, Counter] = {}
+        self._lengths: Dict[Hashable, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._terms
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        """Index a document, replacing any document with the same id."""
+        if doc_id in self._terms:
+            self.remove(doc_id)
+
+        terms = Counter(tokenize(text))
+        self._terms[doc_id] = terms
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_length += self._lengths[doc_id]
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+
+    def remove(self, doc_id: Hashable) -> None:
+        """Remove a document from the index, if present."""
+        terms = self._terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        self._total_length -= self._lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Hashable, float]]:
+        """Return up to k (doc_id, score) pairs, best first."""
+        count = len(self._terms)
+        if count == 0 or k <= 0:
+            return []
+
+        average_length = self._total_length / count
+        scores: Dict[Hashable, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def bm25_scan(query: str, documents: Iterable[Tuple[Hashable, str]], k: int = 5, k1: float = 1.5, b: float = 0.75) -> List[Tuple[Hashable, float]]:
+    """BM25 over a stream of (doc_id, text) pairs, without building an index.
+
+    One pass over the documents: only their lengths and the frequencies of the
+    query terms are kept, so memory grows with the number of matching
+    documents rather than with the size of the collection. Scores are the
+    same as `BM25Index.search` over the same documents.
+    """
+    query_terms = set(tokenize(query))
+    if not query_terms or k <= 0:
+        return []
+
+    count = 0
+    total_length = 0
+    document_frequency: Counter = Counter()
+    # doc_id -> (length, frequencies of the query terms it contains)
+    matches: Dict[Hashable, Tuple[int, Dict[str, int]]] = {}
+    for doc_id, text in documents:
+        tokens = tokenize(text)
+        count += 1
+        total_length += len(tokens)
+        frequencies = Counter(token for token in tokens if token in query_terms)
+        if frequencies:
+            document_frequency.update(frequencies.keys())
+            matches[doc_id] = (len(tokens), frequencies)
+
+    if not matches:
+        return []
+
+    average_length = total_length / count
+    idf = {
+        term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+        for term, frequency in document_frequency.items()
+    }
+    scores = {}
+    for doc_id, (length, frequencies) in matches.items():
+        norm = k1 * (1 - b + b * length / average_length)
+        scores[doc_id] = sum(
+            idf[term] * frequency * (k1 + 1) / (frequency + norm) for term, frequency in frequencies.items()
+        )
+
+    return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -1,6 +1,8 @@
 import os
 import json
 from mcp.server.fastmcp import FastMCP
+from embeddings import get_embedder
+from kb import KnowledgeBase, open_knowledge_base
 
 # Create an MCP server
 mcp = FastMCP(
@@ -9,37 +11,86 @@ mcp = FastMCP(
     port=8050,  # only used for SSE transport (set this to any port)
 )
 
+# Page size used when a JSONL knowledge base is read without an explicit limit
+DEFAULT_PAGE_SIZE = 50
+
+# Loaded on first use and reloaded only when the file changes.
+# Set KB_PATH to a .jsonl file for knowledge bases too large to load whole.
+knowledge_base = open_knowledge_base(
+    os.getenv("KB_PATH", os.path.join(os.path.dirname(__file__), "data", "kb.json")),
+    embedder=get_embedder(),  # KB_EMBEDDER=hashing|projection, KB_EMBEDDING_DIM
+)
+
+
+@mcp.tool()
+def get_knowledge_base(cursor: str = "", limit: int = 0) -> str:
+    """Retrieve the knowledge base as a formatted string, optionally one page at a time.
+
+    Args:
+        cursor: Where to continue from, as returned in "Next cursor" by the previous page.
+        limit: Maximum number of Q&A pairs to return (0 returns the whole knowledge base
+            when it is small enough).
+
+    Returns:
+        A formatted string containing the requested Q&A pairs, followed by the next
+        cursor if there are more.
+    """
+    try:
+        if not cursor and limit <= 0 and isinstance(knowledge_base, KnowledgeBase):
+            return knowledge_base.formatted()
+
+        try:
+            start = int(cursor or 0)
+        except ValueError:
+            return "Error: Invalid cursor"
+        if start < 0:
+            return "Error: Invalid cursor"
+
+        total = len(knowledge_base)
+        entries = knowledge_base.page(start, limit if limit > 0 else DEFAULT_PAGE_SIZE)
+
+        parts = [f"Here is the retrieved knowledge base (entries {start + 1}-{start + len(entries)} of {total}):\n\n"]
+        for i, question, answer in entries:
+            parts.append(f"Q{i}: {question}\nA{i}: {answer}\n\n")
+        if start + len(entries) < total:
+            parts.append(f"Next cursor: {start + len(entries)}\n")
+        return "".join(parts)
+    except FileNotFoundError:
+        return "Error: Knowledge base file not found"
+    except json.JSONDecodeError:
+        return "Error: Invalid JSON in knowledge base file"
+    except Exception as e:
+        return f"Error: {str(e)}"
+
 
 @mcp.tool()
-def get_knowledge_base() -> str:
-    """Retrieve the entire knowledge base as a formatted string.
+def search_knowledge_base(query: str, k: int = 3, mode: str = "keyword") -> str:
+    """Search the knowledge base for the Q&A pairs most relevant to a query.
+
+    Prefer this over get_knowledge_base: it returns only the top matches.
+
+    Args:
+        query: The question or keywords to search for.
+        k: Maximum number of Q&A pairs to return.
+        mode: "keyword" for exact term matching, or "semantic" to also match
+            questions phrased differently from the knowledge base.
 
     Returns:
-        A formatted string containing all Q&A pairs from the knowledge base.
+        A formatted string containing the best matching Q&A pairs.
     """
     try:
-        kb_path = os.path.join(os.path.dirname(__file__), "data", "kb.json")
-        with open(kb_path, "r") as f:
-            kb_data = json.load(f)
-
-        # Format the knowledge base as a string
-        kb_text = "Here is the retrieved knowledge base:\n\n"
-
-        if isinstance(kb_data, list):
-            for i, item in enumerate(kb_data, 1):
-                if isinstance(item, dict):
-                    question = item.get("question", "Unknown question")
-                    answer = item.get("answer", "Unknown answer")
-                else:
-                    question = f"Item {i}"
-                    answer = str(item)
-
-                kb_text += f"Q{i}: {question}\n"
-                kb_text += f"A{i}: {answer}\n\n"
+        k = max(1, min(k, 20))
+        if mode == "semantic":
+            results = knowledge_base.semantic_search(query, k)
         else:
-            kb_text += f"Knowledge base content: {json.dumps(kb_data, indent=2)}\n\n"
+            results = knowledge_base.search(query, k)
+        if not results:
+            return "No matching entries found in the knowledge base"
 
-        return kb_text
+        parts = [f"Here are the {len(results)} most relevant knowledge base entries:\n\n"]
+        for i, question, answer in results:
+            parts.append(f"Q{i}: {question}\nA{i}: {answer}\n\n")
+        return "".join(parts)
     except FileNotFoundError:
         return "Error: Knowledge base file not found"
     except json.JSONDecodeError:
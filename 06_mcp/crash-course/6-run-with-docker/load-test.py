@@ -0,0 +1,246 @@
+"""Load generator for an MCP server running with SSE transport.
+
+Opens N concurrent SSE sessions and has each one run a mix of list_tools and
+call_tool requests, like N agents talking to the same server. Reports
+sessions/sec, calls/sec, errors by exception type, latency histograms and the
+server's memory over time.
+
+Without --arguments, each ``add`` call gets fresh seeded random operands, so
+the server's memoization of ``add`` doesn't turn the run into cache hits.
+
+Make sure the server is running first, e.g.:
+docker run -p 8050:8050 mcp-server        (then pass --container <name>)
+uv run server.py                          (then pass --pid <server pid>)
+
+Example:
+python load-test.py --sessions 200 --calls 20 --list-ratio 0.2 --container mcp
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import subprocess
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf")]
+
+_SIZE_RE = re.compile(r"([\d.]+)\s*([KMG]i?B|B)")
+_UNITS = {"B": 1, "KB": 1e3, "MB": 1e6, "GB": 1e9, "KiB": 2**10, "MiB": 2**20, "GiB": 2**30}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def histogram(latencies_ms: List[float]) -> Dict[str, int]:
+    """Count latencies per bucket, keyed by the bucket's upper bound."""
+    counts = {f"<={bound:g}ms" if bound != float("inf") else ">5000ms": 0 for bound in BUCKETS_MS}
+    labels = list(counts)
+    for latency in latencies_ms:
+        for label, bound in zip(labels, BUCKETS_MS):
+            if latency <= bound:
+                counts[label] += 1
+                break
+    return counts
+
+
+def error_name(error: BaseException) -> str:
+    """Exception type name; task groups also name the exceptions they wrap."""
+    if isinstance(error, BaseExceptionGroup):
+        return f"{type(error).__name__}({', '.join(error_name(inner) for inner in error.exceptions)})"
+    return type(error).__name__
+
+
+def tool_arguments(args: argparse.Namespace, rng: random.Random) -> dict:
+    """Arguments for one call_tool request."""
+    if args.arguments is not None:
+        return args.arguments
+    # Distinct operands per call, so every call reaches the tool
+    return {"a": rng.randint(0, 10**9), "b": rng.randint(0, 10**9)}
+
+
+def read_rss(pid: Optional[int], container: Optional[str]) -> Optional[int]:
+    """Resident memory of the server in bytes, from /proc or `docker stats`."""
+    if pid is not None:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+    if container is not None:
+        try:
+            output = subprocess.run(
+                ["docker", "stats", "--no-stream", "--format", "{{.MemUsage}}", container],
+                capture_output=True, text=True, timeout=10,
+            ).stdout
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        match = _SIZE_RE.search(output)
+        if match:
+            return int(float(match.group(1)) * _UNITS[match.group(2)])
+    return None
+
+
+class Stats:
+    def __init__(self):
+        self.session_ms: List[float] = []
+        # perf_counter() when each session finished initialize()
+        self.opened_at: List[float] = []
+        self.latencies_ms: Dict[str, List[float]] = {"list_tools": [], "call_tool": []}
+        # Error counts per operation, by exception type
+        self.errors: Dict[str, Counter] = {"session": Counter(), "list_tools": Counter(), "call_tool": Counter()}
+        self.rss: List[Dict[str, float]] = []
+
+
+async def run_session(args: argparse.Namespace, stats: Stats, rng: random.Random, start_gate: asyncio.Event):
+    """One simulated agent: open a session, then run its calls one after another."""
+    await start_gate.wait()
+    started = time.perf_counter()
+    try:
+        async with sse_client(args.url) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                opened = time.perf_counter()
+                stats.opened_at.append(opened)
+                stats.session_ms.append((opened - started) * 1000)
+
+                for _ in range(args.calls):
+                    operation = "list_tools" if rng.random() < args.list_ratio else "call_tool"
+                    call_started = time.perf_counter()
+                    try:
+                        if operation == "list_tools":
+                            await session.list_tools()
+                        else:
+                            result = await session.call_tool(args.tool, arguments=tool_arguments(args, rng))
+                            if result.isError:
+                                raise RuntimeError(result.content[0].text if result.content else "tool error")
+                        stats.latencies_ms[operation].append((time.perf_counter() - call_started) * 1000)
+                    except Exception as e:
+                        stats.errors[operation][error_name(e)] += 1
+                    if args.think_time:
+                        await asyncio.sleep(rng.expovariate(1 / args.think_time))
+    except Exception as e:
+        stats.errors["session"][error_name(e)] += 1
+
+
+async def sample_rss(args: argparse.Namespace, stats: Stats, started: float, stop: asyncio.Event):
+    """Record server memory every sample interval until stopped."""
+    while not stop.is_set():
+        rss = await asyncio.to_thread(read_rss, args.pid, args.container)
+        if rss is not None:
+            stats.rss.append({"t": round(time.perf_counter() - started, 2), "rss_bytes": rss})
+        try:
+            await asyncio.wait_for(stop.wait(), args.sample_interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(args: argparse.Namespace) -> dict:
+    stats = Stats()
+    rng = random.Random(args.seed)
+    start_gate = asyncio.Event()
+    stop = asyncio.Event()
+
+    # Each session gets its own RNG, so the mix is reproducible for a given seed
+    sessions = [
+        asyncio.create_task(run_session(args, stats, random.Random(rng.random()), start_gate))
+        for _ in range(args.sessions)
+    ]
+
+    started = time.perf_counter()
+    sampler = asyncio.create_task(sample_rss(args, stats, started, stop))
+    start_gate.set()
+    await asyncio.gather(*sessions)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+
+    calls = sum(len(latencies) for latencies in stats.latencies_ms.values())
+    # Sessions are opened from the first start to the last initialize(), not over the whole run
+    open_window = max(stats.opened_at) - started if stats.opened_at else 0.0
+    report = {
+        "params": {key: value for key, value in vars(args).items() if key != "output"},
+        "elapsed_seconds": round(elapsed, 3),
+        "sessions_opened": len(stats.session_ms),
+        "session_open_seconds": round(open_window, 3),
+        "sessions_per_second": round(len(stats.opened_at) / open_window, 2) if open_window else 0.0,
+        "calls": calls,
+        "calls_per_second": round(calls / elapsed, 2),
+        "errors": {operation: sum(counts.values()) for operation, counts in stats.errors.items()},
+        "errors_by_type": {operation: dict(counts) for operation, counts in stats.errors.items() if counts},
+        "latency_ms": {},
+        "rss": stats.rss,
+    }
+    for name, latencies in [("session", stats.session_ms), *stats.latencies_ms.items()]:
+        if latencies:
+            report["latency_ms"][name] = {
+                "p50": round(percentile(latencies, 50), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+                "max": round(max(latencies), 2),
+                "histogram": histogram(latencies),
+            }
+    return report
+
+
+def print_report(report: dict):
+    print(f"\nSessions: {report['sessions_opened']} opened in {report['session_open_seconds']}s ({report['sessions_per_second']}/s)")
+    print(f"Calls:    {report['calls']} in {report['elapsed_seconds']}s ({report['calls_per_second']}/s)")
+    print(f"Errors:   {report['errors']}")
+    for operation, counts in report["errors_by_type"].items():
+        for name, count in counts.items():
+            print(f"  {operation}: {name} x{count}")
+
+    for name, latency in report["latency_ms"].items():
+        print(f"\n{name} latency: p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms max={latency['max']}ms")
+        peak = max(latency["histogram"].values()) or 1
+        for label, count in latency["histogram"].items():
+            if count:
+                print(f"  {label:>9} {count:>7} {'#' * max(1, round(40 * count / peak))}")
+
+    if report["rss"]:
+        print("\nServer RSS over time:")
+        for sample in report["rss"]:
+            print(f"  {sample['t']:>7}s {sample['rss_bytes'] / 2**20:8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8050/sse")
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent SSE sessions")
+    parser.add_argument("--calls", type=int, default=20, help="Requests per session")
+    parser.add_argument("--list-ratio", type=float, default=0.2, help="Fraction of requests that are list_tools")
+    parser.add_argument("--tool", default="add", help="Tool used for call_tool")
+    parser.add_argument(
+        "--arguments", type=json.loads,
+        help="Tool arguments as JSON, the same for every call (default: random a and b for add)",
+    )
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a session's calls (s)")
+    parser.add_argument("--pid", type=int, help="Server process id, to sample its RSS from /proc")
+    parser.add_argument("--container", help="Docker container name, to sample its memory with docker stats")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between memory samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report as JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
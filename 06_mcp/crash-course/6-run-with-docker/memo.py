@@ -0,0 +1,144 @@
+import copy
+import functools
+import inspect
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+from mcp.server.fastmcp import FastMCP
+from pydantic_core import to_jsonable_python
+
+
+class ToolCache:
+    """Bounded LRU of tool results, keyed by tool name and canonicalized arguments."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(name: str, signature: inspect.Signature, args: tuple, kwargs: dict) -> Tuple[str, str]:
+        """Same key for the same call, whatever the argument order or defaults used."""
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return name, json.dumps(to_jsonable_python(bound.arguments), sort_keys=True, separators=(",", ":"))
+
+    def _count(self, name: str, field: str):
+        counts = self._counts.setdefault(name, {"hits": 0, "misses": 0})
+        counts[field] += 1
+
+    def get(self, key: Tuple[str, str]) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._count(key[0], "hits")
+                # Copy so callers can't mutate the cached value
+                return True, copy.deepcopy(self._entries[key])
+            self.misses += 1
+            self._count(key[0], "misses")
+            return False, None
+
+    def put(self, key: Tuple[str, str], value: Any):
+        with self._lock:
+            self._entries[key] = copy.deepcopy(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "tools": copy.deepcopy(self._counts),
+            }
+
+
+class MemoizedTools:
+    """Opt-in memoization for pure tools on a FastMCP server.
+
+    Use `memo.tool()` instead of `mcp.tool()` on tools whose result depends only
+    on their arguments. Repeated calls with the same arguments are answered from
+    a shared LRU without running the tool. Exceptions are not cached. A
+    `cache_stats` tool reports hits, misses and evictions.
+
+    Example:
+        mcp = FastMCP("Calculator")
+        memo = MemoizedTools(mcp, maxsize=1024)
+
+        @memo.tool()
+        def add(a: int, b: int) -> int:
+            return a + b
+    """
+
+    def __init__(self, mcp: FastMCP, maxsize: int = 1024, stats_tool: bool = True):
+        """Initialize memoization for a server.
+
+        Args:
+            mcp: The server to register tools on.
+            maxsize: Maximum number of cached results across all memoized tools.
+            stats_tool: Whether to register the `cache_stats` tool.
+        """
+        self.mcp = mcp
+        self.cache = ToolCache(maxsize)
+        if stats_tool:
+            # A named function, so the tool's argument schema is titled after the tool
+            def cache_stats() -> Dict[str, Any]:
+                """Report hit, miss and eviction counts of the tool result cache"""
+                return self.cache.stats()
+
+            mcp.tool()(cache_stats)
+
+    def tool(self, name: str | None = None, description: str | None = None) -> Callable:
+        """Like `FastMCP.tool()`, for a pure tool whose results can be reused."""
+
+        def decorator(fn: Callable) -> Callable:
+            tool_name = name or fn.__name__
+            signature = inspect.signature(fn)
+
+            if inspect.iscoroutinefunction(fn):
+
+                @functools.wraps(fn)
+                async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                    key = self.cache.key(tool_name, signature, args, kwargs)
+                    hit, value = self.cache.get(key)
+                    if hit:
+                        return value
+                    value = await fn(*args, **kwargs)
+                    self.cache.put(key, value)
+                    return value
+
+            else:
+
+                @functools.wraps(fn)
+                def wrapper(*args: Any, **kwargs: Any) -> Any:
+                    key = self.cache.key(tool_name, signature, args, kwargs)
+                    hit, value = self.cache.get(key)
+                    if hit:
+                        return value
+                    value = fn(*args, **kwargs)
+                    self.cache.put(key, value)
+                    return value
+
+            # FastMCP builds the tool schema from the signature, which wraps() preserves
+            self.mcp.tool(name=name, description=description)(wrapper)
+            return fn
+
+        return decorator
@@ -1,9 +1,15 @@
 from langgraph.graph import StateGraph, START, END
-from langchain.chat_models import init_chat_model
-from typing import TypedDict
+from src.models import get_chat_model
+from src.instrumentation import instrument
+from src.cache import response_cache
+from typing import Any, TypedDict
 
 
-llm = init_chat_model(model="gpt-4o-mini", temperature=0)
+# temperature=0 makes answers repeatable, so identical questions are served from the cache
+llm = get_chat_model("gpt-4o-mini", temperature=0, cache=response_cache("agent"))
+
+# The same model without the response cache, for runs whose latency and tokens are measured
+uncached_llm = get_chat_model("gpt-4o-mini", temperature=0, cache=False)
 
 class AgentState(TypedDict):
     question: str
@@ -14,34 +20,39 @@ You are a helpful assistant that can answer questions and help with tasks.
 """
 
 
-def agent_node(state: AgentState):
+def build_graph(llm) -> Any:
+    """Compile the agent graph around ``llm``"""
     
-    user_input = state["question"]
-
+    def agent_node(state: AgentState):
+        
+        user_input = state["question"]
+        
+        messages_list = [
+            {
+                "role": "system",
+                "content": AGENT_PROMPT
+            },
+            {
+                "role": "user",
+                "content": user_input
+            }
+        ] 
+        
+        response = llm.invoke(messages_list)
+        
+        return {"answer": response.content}
     
-    messages_list = [
-        {
-            "role": "system",
-            "content": AGENT_PROMPT
-        },
-        {
-            "role": "user",
-            "content": user_input
-        }
-    ] 
+    graph_builder = StateGraph(AgentState)
     
-    response = llm.invoke(messages_list)
+    graph_builder.add_node("agent", agent_node)
     
- 
-    return {"answer": response.content}
-
-
-
-graph_builder = StateGraph(AgentState)
+    graph_builder.add_edge(START, "agent")
+    graph_builder.add_edge("agent", END)
+    
+    return graph_builder.compile()
 
-graph_builder.add_node("agent", agent_node)
 
-graph_builder.add_edge(START, "agent")
-graph_builder.add_edge("agent", END)
+graph = instrument(build_graph(llm), "agent")
 
-graph = graph_builder.compile()
\ No newline at end of file
+# Used by src.eval_runner, so every example really calls the model
+uncached_graph = instrument(build_graph(uncached_llm), "agent_uncached")
\ No newline at end of file
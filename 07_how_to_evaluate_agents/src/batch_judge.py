@@ -0,0 +1,253 @@
+"""Batched LLM-as-judge grading.
+
+The correctness judge normally makes one structured-output call per example.
+For short factual QA most of that call is the fixed cost of the request and the
+instructions, so ``BatchGrader`` collects the examples being graded at the same
+time and sends them as numbered ITEMs in one call that returns a list of grades.
+
+- Batches are packed to fit ``JUDGE_CONTEXT_TOKENS`` of prompt and
+  ``JUDGE_OUTPUT_TOKENS`` of grades, and hold at most ``JUDGE_BATCH_SIZE``
+  items, so long answers make smaller batches.
+- Every returned grade must carry the id of an ITEM of the batch, once.
+  Items whose grade is missing, duplicated or malformed are sent again without
+  the rest of the batch; after ``max_retries`` they are graded one by one with
+  the regular prompt.
+
+Use it through the ``correctness`` entry of ``BATCHED_EVALUATORS``, e.g. with
+``python -m src.eval_runner ... --batch-judge``.
+"""
+import asyncio
+import hashlib
+import os
+from typing import Any, Optional
+
+from typing_extensions import Annotated, TypedDict
+
+from src.evaluators import (
+    JUDGE_MODEL,
+    JUDGE_PROMPT_VERSION,
+    correctness_answers,
+    correctness_instructions,
+    correctness_messages,
+    grader_llm,
+)
+from src.judge_cache import JudgeCache, judge_cache
+from src.models import get_chat_model
+
+# Prompt tokens per judge call, and completion tokens for the grades
+JUDGE_CONTEXT_TOKENS = int(os.getenv("JUDGE_CONTEXT_TOKENS", "16000"))
+JUDGE_OUTPUT_TOKENS = int(os.getenv("JUDGE_OUTPUT_TOKENS", "4000"))
+# Upper bound on items per call, whatever the budget allows
+JUDGE_BATCH_SIZE = int(os.getenv("JUDGE_BATCH_SIZE", "20"))
+# Rough size of one grade (id, step-by-step explanation, verdict) in tokens
+GRADE_TOKENS = 200
+
+
+# Grade output schema
+class ItemGrade(TypedDict):
+    id: Annotated[str, ..., "The id of the ITEM this grade is for"]
+    explanation: Annotated[str, ..., "Explain your reasoning for the score"]
+    correct: Annotated[bool, ..., "True if the answer is correct, False otherwise."]
+
+
+class BatchGrades(TypedDict):
+    grades: Annotated[list[ItemGrade], ..., "Exactly one grade per ITEM"]
+
+
+# Grade prompt
+batch_instructions = correctness_instructions + """
+You will be given several ITEMs, each with an id, a QUESTION, a GROUND TRUTH ANSWER and a STUDENT ANSWER.
+Grade every ITEM on its own, and return exactly one grade per ITEM, with that ITEM's id.
+"""
+
+batch_item = """\
+ITEM {id}:
+{answers}"""
+
+# Grader LLM
+batch_grader_llm = get_chat_model(JUDGE_MODEL).with_structured_output(BatchGrades)
+
+BATCH_JUDGE_PROMPT_VERSION = hashlib.sha256(
+    "\x00".join([JUDGE_PROMPT_VERSION, batch_instructions, batch_item]).encode()
+).hexdigest()[:16]
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+class _Item:
+    """One example waiting for its grade."""
+
+    def __init__(self, inputs: dict, outputs: dict, reference_outputs: dict, future: asyncio.Future):
+        self.inputs = inputs
+        self.outputs = outputs
+        self.reference_outputs = reference_outputs
+        self.future = future
+        self.answers = correctness_answers.format(
+            question=inputs["question"],
+            reference=reference_outputs["answer"],
+            answer=outputs["answer"],
+        )
+        self.tokens = estimate_tokens(self.answers) + estimate_tokens(batch_item)
+
+
+class BatchGrader:
+    """Collects concurrent grading requests and grades them in batched judge calls."""
+
+    def __init__(
+        self,
+        context_tokens: int = JUDGE_CONTEXT_TOKENS,
+        output_tokens: int = JUDGE_OUTPUT_TOKENS,
+        max_batch_size: int = JUDGE_BATCH_SIZE,
+        max_wait: float = 0.2,
+        max_retries: int = 2,
+    ):
+        """Initialize the grader.
+
+        Args:
+            context_tokens: Prompt budget of one judge call, instructions included.
+            output_tokens: Completion budget of one judge call.
+            max_batch_size: Most items in one call.
+            max_wait: Seconds a request waits for others to share its call.
+            max_retries: Batched retries of the items that came back unusable.
+        """
+        self.max_batch_size = max(1, min(max_batch_size, output_tokens // GRADE_TOKENS))
+        self.item_budget = context_tokens - estimate_tokens(batch_instructions)
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: list[_Item] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._stats = {"judge_calls": 0, "items": 0, "retried_items": 0, "single_calls": 0}
+
+    def stats(self) -> dict[str, Any]:
+        """Return call and item counters since the last reset."""
+        return dict(self._stats)
+
+    def reset_stats(self) -> None:
+        self._stats = dict.fromkeys(self._stats, 0)
+
+    async def grade(self, inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
+        """Grade one example as part of the next batch. Returns its ``CorrectnessGrade``."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A new event loop (e.g. the next chunk in a worker process) starts empty
+            self._loop, self._pending, self._pending_tokens, self._timer = loop, [], 0, None
+
+        item = _Item(inputs, outputs, reference_outputs, loop.create_future())
+        if self._pending and self._pending_tokens + item.tokens > self.item_budget:
+            self._flush()
+        self._pending.append(item)
+        self._pending_tokens += item.tokens
+
+        if len(self._pending) >= self.max_batch_size or self._pending_tokens >= self.item_budget:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await item.future
+
+    def _flush(self) -> None:
+        """Send everything pending as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if batch:
+            task = self._loop.create_task(self._grade_batch(batch))
+            # Keep a reference until done, the loop only holds weak ones
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _grade_batch(self, batch: list[_Item]) -> None:
+        """Grade a batch, retrying only the items without a usable grade."""
+        self._stats["items"] += len(batch)
+        # Ids stay the same across retries so the judge sees consistent numbering
+        remaining = {str(number): item for number, item in enumerate(batch, 1)}
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._stats["retried_items"] += len(remaining)
+            try:
+                grades = await self._call(remaining)
+            except Exception:
+                grades = {}
+            for item_id, grade in grades.items():
+                future = remaining.pop(item_id).future
+                # The caller may have been cancelled while the batch was graded
+                if not future.done():
+                    future.set_result(grade)
+            # Don't regrade items nobody is waiting for anymore
+            remaining = {item_id: item for item_id, item in remaining.items() if not item.future.done()}
+            if not remaining:
+                return
+
+        # Whatever the batched judge keeps getting wrong is graded on its own
+        await asyncio.gather(*(self._grade_single(item) for item in remaining.values()))
+
+    async def _call(self, items: dict[str, _Item]) -> dict[str, dict]:
+        """Make one batched judge call. Returns the valid grades by item id."""
+        self._stats["judge_calls"] += 1
+        answers = "\n".join(batch_item.format(id=item_id, answers=item.answers) for item_id, item in items.items())
+        result = await batch_grader_llm.ainvoke(
+            [
+                {"role": "system", "content": batch_instructions},
+                {"role": "user", "content": answers},
+            ]
+        )
+
+        grades: dict[str, dict] = {}
+        duplicates = set()
+        for grade in (result or {}).get("grades") or []:
+            if not (
+                isinstance(grade, dict)
+                and isinstance(grade.get("explanation"), str)
+                and isinstance(grade.get("correct"), bool)
+            ):
+                continue
+            item_id = str(grade.get("id", "")).strip()
+            if item_id not in items:
+                continue
+            if item_id in grades:
+                # Two grades for one item: trust neither
+                duplicates.add(item_id)
+            grades[item_id] = {"explanation": grade["explanation"], "correct": grade["correct"]}
+        for item_id in duplicates:
+            del grades[item_id]
+        return grades
+
+    async def _grade_single(self, item: _Item) -> None:
+        self._stats["single_calls"] += 1
+        try:
+            grade = await grader_llm.ainvoke(correctness_messages(item.inputs, item.outputs, item.reference_outputs))
+        except Exception as e:
+            if not item.future.done():
+                item.future.set_exception(e)
+        else:
+            if not item.future.done():
+                item.future.set_result(grade)
+
+
+batch_grader = BatchGrader()
+
+
+async def acorrectness_batched(inputs: dict, outputs: dict, reference_outputs: dict) -> bool:
+    """An evaluator for answer accuracy, graded in batches with other examples"""
+
+    cache = judge_cache()
+    key = JudgeCache.key(BATCH_JUDGE_PROMPT_VERSION, inputs["question"], reference_outputs["answer"], outputs["answer"])
+    grade = cache.get(key)
+    if grade is None:
+        grade = await batch_grader.grade(inputs, outputs, reference_outputs)
+        cache.put(key, BATCH_JUDGE_PROMPT_VERSION, grade)
+    return grade["correct"]
+
+
+# Batched counterparts of src.evaluators.EVALUATORS, by the same names
+BATCHED_EVALUATORS = {
+    "correctness": acorrectness_batched,
+}
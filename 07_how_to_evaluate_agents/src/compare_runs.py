@@ -0,0 +1,172 @@
+"""Compare the latency and token usage of two evaluation runs.
+
+Takes two results files written by ``src.eval_runner`` and, for the examples
+that succeeded in both without any answer from the response cache, compares the agent's p95 latency and p95 time to first
+token, and its mean prompt tokens, completion tokens and LLM calls per example.
+
+A change is only flagged when it is statistically significant: examples are
+resampled in pairs (the same example in both runs) with a bootstrap, and the
+confidence interval of the change must lie entirely above zero. It is reported
+as a regression when it is also larger than ``--threshold``. The exit status is
+1 when there is a regression, so the command can gate CI.
+
+Run from the project directory::
+
+    python -m src.compare_runs results/base.jsonl results/new.jsonl
+    python -m src.compare_runs results/base.jsonl results/new.jsonl --threshold 0.05 --confidence 0.99
+"""
+import argparse
+import json
+import random
+import sys
+from typing import Callable, Optional
+
+# Metric recorded by the runner -> statistic compared across runs
+METRICS = {
+    "latency_seconds": "p95",
+    "ttft_seconds": "p95",
+    "prompt_tokens": "mean",
+    "completion_tokens": "mean",
+    "llm_calls": "mean",
+}
+
+# Below this many paired examples a p95 is mostly the single slowest one
+MIN_EXAMPLES = 20
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def mean(values: list[float]) -> float:
+    return sum(values) / len(values)
+
+
+STATISTICS: dict[str, Callable[[list[float]], float]] = {
+    "p95": lambda values: percentile(values, 95),
+    "mean": mean,
+}
+
+
+def load_metrics(path: str) -> dict[str, dict]:
+    """Return the metrics of every successful example in a results file, by id.
+
+    Examples with response cache hits are left out: their latency and tokens
+    don't describe model calls. When an example appears more than once (it was
+    retried on resume), its last result wins.
+    """
+    metrics = {}
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if result.get("error") or not result.get("metrics") or result["metrics"].get("cache_hits"):
+                metrics.pop(result["id"], None)
+                continue
+            metrics[result["id"]] = result["metrics"]
+    return metrics
+
+
+def bootstrap_change(
+    base: list[float],
+    new: list[float],
+    statistic: Callable[[list[float]], float],
+    confidence: float,
+    resamples: int,
+    rng: random.Random,
+) -> Optional[tuple[float, float, float]]:
+    """Relative change of ``statistic`` from ``base`` to ``new``, with its confidence interval.
+
+    ``base[i]`` and ``new[i]`` are the same example, and are resampled together.
+
+    Returns:
+        (change, low, high) as fractions, or ``None`` when the base statistic is 0.
+    """
+    base_value = statistic(base)
+    if base_value == 0:
+        return None
+    change = statistic(new) / base_value - 1
+
+    indices = range(len(base))
+    changes = []
+    for _ in range(resamples):
+        sample = rng.choices(indices, k=len(base))
+        resampled_base = statistic([base[i] for i in sample])
+        if resampled_base:
+            changes.append(statistic([new[i] for i in sample]) / resampled_base - 1)
+    changes.sort()
+    tail = (1 - confidence) / 2
+    low = changes[int(tail * (len(changes) - 1))]
+    high = changes[int((1 - tail) * (len(changes) - 1))]
+    return change, low, high
+
+
+def compare(
+    base_path: str,
+    new_path: str,
+    threshold: float = 0.1,
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    seed: int = 0,
+) -> int:
+    """Print the change of every metric between two runs; return 1 on regressions."""
+    base, new = load_metrics(base_path), load_metrics(new_path)
+    ids = sorted(base.keys() & new.keys())
+    print(f"{len(ids)} examples succeeded uncached in both runs ({len(base)} in base, {len(new)} in new)")
+    if not ids:
+        return 0
+    if len(ids) < MIN_EXAMPLES:
+        print(f"Warning: fewer than {MIN_EXAMPLES} examples, p95 comparisons are unreliable")
+
+    rng = random.Random(seed)
+    regressions = 0
+    for metric, statistic_name in METRICS.items():
+        pairs = [
+            (base[i][metric], new[i][metric])
+            for i in ids
+            if base[i].get(metric) is not None and new[i].get(metric) is not None
+        ]
+        if not pairs:
+            continue
+        base_values = [pair[0] for pair in pairs]
+        new_values = [pair[1] for pair in pairs]
+        statistic = STATISTICS[statistic_name]
+
+        result = bootstrap_change(base_values, new_values, statistic, confidence, resamples, rng)
+        label = f"{metric} {statistic_name}: {statistic(base_values):.4g} -> {statistic(new_values):.4g}"
+        if result is None:
+            print(f"{label} (no change computed, base is 0)")
+            continue
+
+        change, low, high = result
+        significant = low > 0 or high < 0
+        worse = low > 0 and change > threshold
+        if worse:
+            regressions += 1
+        marker = "REGRESSION" if worse else "significant" if significant else ""
+        print(f"{label} ({change:+.1%}, {confidence:.0%} CI {low:+.1%}..{high:+.1%}) {marker}")
+
+    print(f"\n{regressions} significant regression(s) above {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare latency and token usage of two evaluation runs")
+    parser.add_argument("base", help="Results file of the baseline run")
+    parser.add_argument("new", help="Results file of the run to check")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative increase reported as a regression")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the bootstrap interval")
+    parser.add_argument("--resamples", type=int, default=2000, help="Bootstrap resamples")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sys.exit(compare(args.base, args.new, args.threshold, args.confidence, args.resamples, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""Local, parallel evaluation runner with checkpoint and resume.
+
+Reads a JSONL dataset with one example per line in the same shape as the
+notebook's ``dataset_examples``::
+
+    {"inputs": {"question": ...}, "outputs": {"answer": ...}}
+
+runs the agent and the evaluators on every example with bounded concurrency,
+and appends one JSON line per finished example to the results file as soon as
+it is done. Rerunning the same command skips examples already in the results
+file, so an interrupted run resumes where it stopped. Grades of answers that did
+not change since an earlier run come from the judge cache (``src.judge_cache``).
+With ``--batch-judge`` the judge grades several examples per call
+(``src.batch_judge``).
+
+Each result also records the agent's latency, time to first token, prompt and
+completion tokens and LLM calls for that example, so two runs can be compared
+for performance regressions with ``src.compare_runs``. The agent runs without
+its response cache so that every example really calls the model; pass
+``--response-cache`` to allow cached answers, whose count per example is
+recorded as ``cache_hits``.
+
+Run from the project directory::
+
+    python -m src.eval_runner datasets/agent_evaluation.jsonl results/run.jsonl
+    python -m src.eval_runner datasets/big.jsonl results/big.jsonl --concurrency 32 --processes 4
+    python -m src.eval_runner datasets/big.jsonl results/big.jsonl --concurrency 64 --batch-judge
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, Optional
+from uuid import uuid4
+
+from src.agent import graph, uncached_graph
+from src.batch_judge import BATCHED_EVALUATORS, batch_grader
+from src.evaluators import EVALUATORS
+from src.instrumentation import get_graph_metrics
+from src.judge_cache import judge_cache
+
+# Examples handed to a worker process at a time
+PROCESS_CHUNK_SIZE = 16
+
+
+def load_examples(path: str) -> list[dict]:
+    """Read a JSONL dataset. Each example gets an ``id`` (its own, or its line number)."""
+    examples = []
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            example = json.loads(line)
+            example.setdefault("id", str(line_number))
+            examples.append(example)
+    return examples
+
+
+def load_finished(path: str, retry_errors: bool = True) -> set[str]:
+    """Return the ids of examples already in a results file."""
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interruption; that example runs again
+                continue
+            if retry_errors and result.get("error"):
+                continue
+            finished.add(result["id"])
+    return finished
+
+
+async def target_function(inputs: dict, response_cache: bool = False) -> tuple[dict, dict]:
+    """Run the agent on one example.
+
+    The graph is streamed in ``messages`` mode so its LLM calls stream too and
+    the time to the first token can be measured.
+
+    Args:
+        inputs: The example's inputs.
+        response_cache: Let the agent answer from its response cache. Cached
+            answers are counted in ``cache_hits``, not in the LLM calls and tokens.
+
+    Returns:
+        The outputs, and the latency and token metrics of the run.
+    """
+    agent, graph_name = (graph, "agent") if response_cache else (uncached_graph, "agent_uncached")
+    run_id = uuid4()
+    state = None
+    started = time.perf_counter()
+    async for mode, chunk in agent.astream(inputs, {"run_id": run_id}, stream_mode=["messages", "values"]):
+        if mode == "values":
+            state = chunk
+    latency = time.perf_counter() - started
+
+    summary = get_graph_metrics(graph_name).run_summary(run_id) or {}
+    ttft = summary.get("ttft_seconds")
+    metrics = {
+        "latency_seconds": round(latency, 4),
+        "ttft_seconds": round(ttft, 4) if ttft is not None else None,
+        "prompt_tokens": summary.get("prompt_tokens", 0),
+        "completion_tokens": summary.get("completion_tokens", 0),
+        "llm_calls": summary.get("llm_calls", 0),
+        "cache_hits": summary.get("cache_hits", 0),
+    }
+    return {"answer": state["answer"]}, metrics
+
+
+async def run_evaluator(evaluator: Callable, inputs: dict, outputs: dict, reference_outputs: dict) -> Any:
+    """Call an evaluator; sync evaluators run in a worker thread."""
+    if inspect.iscoroutinefunction(evaluator):
+        return await evaluator(inputs, outputs, reference_outputs)
+    return await asyncio.to_thread(evaluator, inputs, outputs, reference_outputs)
+
+
+async def evaluate_example(example: dict, evaluators: dict[str, Callable], response_cache: bool = False) -> dict:
+    """Run the target and every evaluator on one example, capturing failures."""
+    result = {
+        "id": example["id"],
+        "inputs": example["inputs"],
+        "reference_outputs": example.get("outputs", {}),
+        "outputs": None,
+        "metrics": None,
+        "scores": {},
+        "error": None,
+    }
+    started = time.perf_counter()
+    try:
+        result["outputs"], result["metrics"] = await target_function(example["inputs"], response_cache)
+        names = list(evaluators)
+        scores = await asyncio.gather(
+            *(run_evaluator(evaluators[name], example["inputs"], result["outputs"], result["reference_outputs"]) for name in names)
+        )
+        result["scores"] = dict(zip(names, scores))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+async def aevaluate(
+    examples: Iterable[dict],
+    evaluators: dict[str, Callable],
+    concurrency: int,
+    on_result: Callable[[dict], None],
+    response_cache: bool = False,
+) -> None:
+    """Evaluate examples with at most ``concurrency`` in flight, reporting each as it finishes."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(example: dict):
+        async with semaphore:
+            on_result(await evaluate_example(example, evaluators, response_cache))
+
+    await asyncio.gather(*(one(example) for example in examples))
+
+
+def get_evaluators(names: list[str], batch_judge: bool = False) -> dict[str, Callable]:
+    """Look up evaluators by name, preferring the batched version of each when asked."""
+    batched = BATCHED_EVALUATORS if batch_judge else {}
+    return {name: batched.get(name, EVALUATORS[name]) for name in names}
+
+
+def reset_judge_stats():
+    judge_cache().reset_stats()
+    batch_grader.reset_stats()
+
+
+def judge_stats() -> dict[str, dict]:
+    """Judge cache and batched judge counters since the last reset."""
+    return {"judge_cache": judge_cache().stats(), "batch_judge": batch_grader.stats()}
+
+
+def add_judge_stats(total: dict[str, dict], stats: dict[str, dict]):
+    for group, counters in stats.items():
+        for name, value in counters.items():
+            total[group][name] = total[group].get(name, 0) + value
+
+
+def _evaluate_chunk(
+    examples: list[dict], evaluator_names: list[str], concurrency: int, batch_judge: bool, response_cache: bool
+) -> tuple[list[dict], dict]:
+    """Worker process entry point: evaluate a chunk of examples.
+
+    Returns the results and the judge counters of this chunk.
+    """
+    results = []
+    reset_judge_stats()
+    asyncio.run(aevaluate(examples, get_evaluators(evaluator_names, batch_judge), concurrency, results.append, response_cache))
+    return results, judge_stats()
+
+
+def summarize(path: str) -> dict:
+    """Aggregate a results file: counts, errors and the mean of each score."""
+    totals: dict[str, list[float]] = {}
+    count = errors = 0
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            count += 1
+            if result.get("error"):
+                errors += 1
+                continue
+            for name, score in result["scores"].items():
+                if isinstance(score, (bool, int, float)):
+                    totals.setdefault(name, []).append(float(score))
+    return {
+        "examples": count,
+        "errors": errors,
+        "scores": {name: sum(values) / len(values) for name, values in totals.items()},
+    }
+
+
+def run(
+    dataset_path: str,
+    results_path: str,
+    evaluator_names: Optional[list[str]] = None,
+    concurrency: int = 8,
+    processes: int = 0,
+    retry_errors: bool = True,
+    batch_judge: bool = False,
+    response_cache: bool = False,
+) -> dict:
+    """Evaluate a dataset, resuming from an existing results file.
+
+    Args:
+        dataset_path: JSONL dataset.
+        results_path: JSONL results file, appended to as examples finish.
+        evaluator_names: Names from ``src.evaluators.EVALUATORS``. Defaults to all.
+        concurrency: Examples in flight at once (across all processes).
+        processes: Worker processes; 0 runs everything on one event loop.
+        retry_errors: Whether examples that failed last time run again.
+        batch_judge: Grade several examples per judge call (``src.batch_judge``).
+        response_cache: Let the agent answer from its response cache.
+
+    Returns:
+        The summary of the whole results file, plus the judge counters of this run.
+    """
+    evaluator_names = evaluator_names or list(EVALUATORS)
+    finished = load_finished(results_path, retry_errors)
+    pending = [example for example in load_examples(dataset_path) if example["id"] not in finished]
+    print(f"{len(finished)} examples already done, {len(pending)} to run")
+
+    totals = {"judge_cache": {}, "batch_judge": {}}
+    os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+    with open(results_path, "a+") as out:
+        # Terminate a line cut short by an interruption before appending
+        if out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+
+        def write(result: dict):
+            # One line per example, flushed so an interruption loses at most the ones in flight
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            status = "error" if result["error"] else result["scores"]
+            print(f"[{result['id']}] {status}")
+
+        if processes > 0:
+            per_process = max(1, concurrency // processes)
+            chunks = [pending[i:i + PROCESS_CHUNK_SIZE] for i in range(0, len(pending), PROCESS_CHUNK_SIZE)]
+            with ProcessPoolExecutor(processes) as pool:
+                futures = [
+                    pool.submit(_evaluate_chunk, chunk, evaluator_names, per_process, batch_judge, response_cache)
+                    for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    results, chunk_stats = future.result()
+                    for result in results:
+                        write(result)
+                    add_judge_stats(totals, chunk_stats)
+        else:
+            reset_judge_stats()
+            asyncio.run(aevaluate(pending, get_evaluators(evaluator_names, batch_judge), concurrency, write, response_cache))
+            add_judge_stats(totals, judge_stats())
+
+    summary = summarize(results_path)
+    summary.update(totals)
+    print(json.dumps(summary, indent=2))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the agent on a JSONL dataset")
+    parser.add_argument("dataset", help="JSONL dataset of {inputs, outputs} examples")
+    parser.add_argument("results", help="JSONL results file (appended to, used to resume)")
+    parser.add_argument("--evaluators", nargs="+", help="Evaluator names (default: all)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Examples in flight at once")
+    parser.add_argument("--processes", type=int, default=0, help="Worker processes (0 = single event loop)")
+    parser.add_argument("--no-retry-errors", action="store_true", help="Don't rerun examples that failed")
+    parser.add_argument("--batch-judge", action="store_true", help="Grade several examples per judge call")
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="Let the agent answer from its response cache (latency and tokens then cover only real calls)",
+    )
+    args = parser.parse_args()
+
+    run(
+        args.dataset,
+        args.results,
+        args.evaluators,
+        args.concurrency,
+        args.processes,
+        not args.no_retry_errors,
+        args.batch_judge,
+        args.response_cache,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import hashlib
+
+from typing_extensions import Annotated, TypedDict
+from src.models import get_chat_model
+from src.judge_cache import JudgeCache, judge_cache
+
+
+# Grade output schema
+class CorrectnessGrade(TypedDict):
+    explanation: Annotated[str, ..., "Explain your reasoning for the score"]
+    correct: Annotated[bool, ..., "True if the answer is correct, False otherwise."]
+
+
+# Grade prompt
+correctness_instructions = """
+You are a teacher grading a quiz. 
+You will be given a QUESTION, the GROUND TRUTH (correct) ANSWER, and the STUDENT ANSWER. 
+
+Here is the grade criteria to follow:
+(1) Grade the student answers based ONLY on their factual accuracy relative to the ground truth answer. 
+(2) Ensure that the student answer does not contain any conflicting statements.
+(3) It is OK if the student answer contains more information than the ground truth answer, as long as it is factually accurate relative to the  ground truth answer.
+
+Correctness:
+A correctness value of True means that the student's answer meets all of the criteria.
+A correctness value of False means that the student's answer does not meet all of the criteria.
+
+Explain your reasoning in a step-by-step manner to ensure your reasoning and conclusion are correct. 
+Avoid simply stating the correct answer at the outset.
+"""
+
+correctness_answers = """\
+        QUESTION: {question}
+        GROUND TRUTH ANSWER: {reference}
+        STUDENT ANSWER: {answer}
+    """
+
+# Grader LLM
+JUDGE_MODEL = "gpt-4o"
+grader_llm = get_chat_model(JUDGE_MODEL).with_structured_output(
+    CorrectnessGrade
+)
+
+# Changes whenever the judge model or prompt does, so cached grades from another judge are never reused
+JUDGE_PROMPT_VERSION = hashlib.sha256(
+    "\x00".join([JUDGE_MODEL, correctness_instructions, correctness_answers]).encode()
+).hexdigest()[:16]
+
+
+def correctness_messages(inputs: dict, outputs: dict, reference_outputs: dict) -> list[dict]:
+    """Build the grading prompt for one example"""
+
+    answers = correctness_answers.format(
+        question=inputs["question"],
+        reference=reference_outputs["answer"],
+        answer=outputs["answer"],
+    )
+
+    return [
+        {"role": "system", "content": correctness_instructions},
+        {"role": "user", "content": answers},
+    ]
+
+
+def correctness_key(inputs: dict, outputs: dict, reference_outputs: dict) -> str:
+    """Judge cache key of one graded example"""
+
+    return JudgeCache.key(JUDGE_PROMPT_VERSION, inputs["question"], reference_outputs["answer"], outputs["answer"])
+
+
+def correctness(inputs: dict, outputs: dict, reference_outputs: dict) -> bool:
+    """An evaluator for answer accuracy"""
+
+    # Reuse the grade of an unchanged answer
+    cache = judge_cache()
+    key = correctness_key(inputs, outputs, reference_outputs)
+    grade = cache.get(key)
+    if grade is None:
+        # Run evaluator
+        grade = grader_llm.invoke(correctness_messages(inputs, outputs, reference_outputs))
+        cache.put(key, JUDGE_PROMPT_VERSION, grade)
+    return grade["correct"]
+
+
+async def acorrectness(inputs: dict, outputs: dict, reference_outputs: dict) -> bool:
+    """An evaluator for answer accuracy (async)"""
+
+    cache = judge_cache()
+    key = correctness_key(inputs, outputs, reference_outputs)
+    grade = cache.get(key)
+    if grade is None:
+        grade = await grader_llm.ainvoke(correctness_messages(inputs, outputs, reference_outputs))
+        cache.put(key, JUDGE_PROMPT_VERSION, grade)
+    return grade["correct"]
+
+
+# Evaluators available to the local runner, by name
+EVALUATORS = {
+    "correctness": acorrectness,
+}
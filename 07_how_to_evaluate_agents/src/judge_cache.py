@@ -0,0 +1,118 @@
+"""Persistent cache of LLM-as-judge grades.
+
+A grade depends only on the question, the ground truth, the student answer and
+the judge itself (model and prompt), so it is stored under a hash of exactly
+those. Rerunning an experiment where most answers did not change reuses their
+old grades instead of calling the judge again.
+
+Grades are kept in SQLite, in ``.cache/judge.sqlite`` in the project by
+default. ``JUDGE_CACHE_PATH`` moves the file (``:memory:`` keeps grades for the
+current process only), and ``JUDGE_CACHE=0`` turns the cache off. Both are
+independent of the agent's response cache settings (``LLM_CACHE_DIR``,
+``LLM_CACHE_MEMORY_ONLY``), so disabling that cache keeps the grades.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+JUDGE_CACHE_PATH = os.getenv(
+    "JUDGE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "judge.sqlite"),
+)
+
+_cache: Optional["JudgeCache"] = None
+_cache_lock = threading.Lock()
+
+
+class JudgeCache:
+    """SQLite-backed map from (judge version, question, reference, answer) to a grade."""
+
+    def __init__(self, path: Optional[str] = None, enabled: bool = True):
+        """Initialize the cache.
+
+        Args:
+            path: SQLite file. ``None`` keeps grades in memory only.
+            enabled: When ``False`` every lookup misses and nothing is stored.
+        """
+        self.path = path
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+        if path and path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Worker processes of the runner share the file, so wait on their writes instead of failing
+        self._conn = sqlite3.connect(path or ":memory:", timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS judge_cache (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                grade TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(version: str, question: str, reference: str, answer: str) -> str:
+        # JSON keeps the fields apart, whatever characters they contain
+        return hashlib.sha256(json.dumps([version, question, reference, answer]).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached grade for ``key``, or ``None``."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT grade FROM judge_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            return json.loads(row[0])
+
+    def put(self, key: str, version: str, grade: dict) -> None:
+        """Store a grade."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO judge_cache (key, version, grade, created_at) VALUES (?, ?, ?, ?)",
+                (key, version, json.dumps(grade), time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every grade."""
+        with self._lock:
+            self._conn.execute("DELETE FROM judge_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """Return lookup counters since the last reset. Every hit is a judge call saved."""
+        with self._lock:
+            return dict(self._stats, judge_calls_saved=self._stats["hits"])
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = {"hits": 0, "misses": 0}
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def judge_cache() -> JudgeCache:
+    """Return the process-wide judge cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = JudgeCache(JUDGE_CACHE_PATH, enabled=os.getenv("JUDGE_CACHE", "1") != "0")
+        return _cache
@@ -0,0 +1,105 @@
+"""Deterministic chat model for offline benchmarks.
+
+``ScriptedChatModel`` answers every call after a fixed latency with a fixed
+number of output tokens, and supports ``bind_tools``/``with_structured_output``
+by filling tool arguments from the tool's JSON schema. No network or API key
+is needed.
+"""
+import asyncio
+import time
+from typing import Any, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+def fake_value(schema: dict, defs: dict) -> Any:
+    """Build a small value that satisfies a JSON schema."""
+    if "$ref" in schema:
+        return fake_value(defs[schema["$ref"].split("/")[-1]], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "anyOf" in schema:
+        return fake_value(schema["anyOf"][0], defs)
+
+    kind = schema.get("type", "string")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {name: fake_value(prop, defs) for name, prop in properties.items()}
+    if kind == "array":
+        return [fake_value(schema.get("items", {}), defs) for _ in range(3)]
+    if kind == "integer":
+        return 7
+    if kind == "number":
+        return 7.0
+    if kind == "boolean":
+        return True
+    return "lorem ipsum"
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model with scripted latency and output size."""
+
+    latency: float = 0.02
+    output_tokens: int = 32
+    tool_calls_per_turn: int = 2
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        if tool_choice is not None:
+            kwargs["tool_choice"] = tool_choice
+        return self.bind(tools=formatted, **kwargs)
+
+    def _reply(self, messages: list[BaseMessage], tools: Optional[list[dict]] = None, tool_choice: Any = None) -> AIMessage:
+        prompt_tokens = sum(len(str(message.content).split()) for message in messages)
+        usage = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": prompt_tokens + self.output_tokens,
+        }
+
+        forced = tool_choice not in (None, "auto", "none")
+        # Free tool use: call tools once, then answer after seeing their results
+        wants_tools = forced or (tools and tool_choice != "none" and not isinstance(messages[-1], ToolMessage))
+
+        if tools and wants_tools:
+            chosen = tools[: 1 if forced else self.tool_calls_per_turn]
+            if isinstance(tool_choice, str) and forced:
+                chosen = [tool for tool in tools if tool["function"]["name"] == tool_choice] or tools[:1]
+            tool_calls = []
+            for i, tool in enumerate(chosen):
+                parameters = tool["function"].get("parameters", {})
+                tool_calls.append({
+                    "id": f"call_{i}",
+                    "name": tool["function"]["name"],
+                    "args": fake_value(parameters, parameters.get("$defs", {})),
+                })
+            return AIMessage(content="", tool_calls=tool_calls, usage_metadata=usage)
+
+        return AIMessage(content=" ".join(["lorem"] * self.output_tokens), usage_metadata=usage)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        message = self._reply(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        message = self._reply(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def scripted_model_factory(latency: float, output_tokens: int):
+    """Return an ``init_chat_model``-compatible factory building scripted models."""
+
+    def factory(model: str, **kwargs: Any) -> ScriptedChatModel:
+        # Model config such as temperature is ignored; the response cache is kept
+        return ScriptedChatModel(latency=latency, output_tokens=output_tokens, cache=kwargs.get("cache"))
+
+    return factory
@@ -0,0 +1,254 @@
+"""Offline benchmark for every graph registered in the projects' langgraph.json files.
+
+Each project is benchmarked in its own subprocess. Before any graph module is
+imported, the project's model registry (``set_model_factory`` in
+``models.py``) is pointed at ``ScriptedChatModel``, so runs need no network or
+API key. For each graph and concurrency level the script reports throughput,
+p50/p95/p99 latency and the peak traced memory of a batch of concurrent
+``ainvoke`` calls.
+
+Usage (from the repository root, with a project's environment installed)::
+
+    python benchmarks/graph_bench.py --output bench.json
+    python benchmarks/graph_bench.py --levels 1 10 100 500 --latency 0.05
+    python benchmarks/graph_bench.py --compare base.json bench.json --threshold 0.1
+"""
+import argparse
+import asyncio
+import gc
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROJECTS = [
+    "01_building_basic_chatbot_using_langgraph",
+    "03_workflow_and_agent",
+    "07_how_to_evaluate_agents",
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def input_builder(graph: Any) -> Callable[[int], dict]:
+    """Return a function building the ``i``-th unique input for the graph.
+
+    The input schema is read once here: generating it takes tens of
+    milliseconds, which must not end up in the measured latencies.
+    """
+    properties = graph.get_input_jsonschema().get("properties", {})
+    # Unique text per request, so response caches do not short-circuit the run
+    if "messages" in properties:
+        return lambda i: {"messages": [{"role": "user", "content": f"What is the price of item {i}?"}]}
+    if "customer_email" in properties:
+        return lambda i: {"customer_email": f"Order #{i} arrived damaged. Can I get a replacement?"}
+    if "question" in properties:
+        return lambda i: {"question": f"What is {i} plus {i}?"}
+    raise ValueError(f"Don't know how to build an input for {sorted(properties)}")
+
+
+def run_config() -> dict:
+    """A fresh thread per run, for graphs compiled with a checkpointer."""
+    return {"configurable": {"thread_id": uuid.uuid4().hex}}
+
+
+async def run_level(graph: Any, inputs: list[dict], concurrency: int) -> dict:
+    """Run one invocation per input with at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(graph_input: dict):
+        nonlocal errors
+        async with semaphore:
+            config = run_config()
+            start = time.perf_counter()
+            try:
+                await graph.ainvoke(graph_input, config)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(graph_input) for graph_input in inputs))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(inputs),
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 95) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else None,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else None,
+    }
+
+
+async def measure_memory(graph: Any, inputs: list[dict]) -> int:
+    """Peak traced allocation of one simultaneous run per input, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await asyncio.gather(*(graph.ainvoke(graph_input, run_config()) for graph_input in inputs))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def load_graph(project_dir: str, spec: str) -> Any:
+    """Import a ``path/to/module.py:attr`` graph spec from langgraph.json."""
+    path, attr = spec.split(":")
+    module = importlib.import_module(os.path.splitext(path)[0].replace("/", "."))
+    return getattr(module, attr)
+
+
+def bench_project(project: str, args: argparse.Namespace) -> dict:
+    """Benchmark every graph of one project. Runs inside the child process."""
+    project_dir = os.path.join(REPO_ROOT, project)
+    sys.path.insert(0, project_dir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(project_dir)
+
+    from fake_chat_model import scripted_model_factory
+
+    with open(os.path.join(project_dir, "langgraph.json")) as f:
+        graphs = json.load(f)["graphs"]
+
+    # The registry lives next to the graph modules (graph/models.py or src/models.py)
+    package = next(iter(graphs.values())).split("/")[0]
+    models = importlib.import_module(f"{package}.models")
+    models.set_model_factory(scripted_model_factory(args.latency, args.output_tokens))
+
+    results = {}
+    for name, spec in graphs.items():
+        graph = load_graph(project_dir, spec)
+        build_input = input_builder(graph)
+        levels = {}
+        offset = 0
+        for concurrency in args.levels:
+            requests = max(args.requests, concurrency * 2)
+            inputs = [build_input(offset + i) for i in range(requests)]
+            offset += requests
+            level = levels[str(concurrency)] = asyncio.run(run_level(graph, inputs, concurrency))
+            inputs = [build_input(offset + i) for i in range(concurrency)]
+            offset += concurrency
+            level["peak_memory_bytes"] = asyncio.run(measure_memory(graph, inputs))
+            print(f"{project}/{name} c={concurrency}: {level['throughput_rps']:.1f} rps, {level['errors']} errors", file=sys.stderr)
+        results[name] = levels
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_all(args: argparse.Namespace) -> dict:
+    """Benchmark each project in a fresh interpreter and collect the results."""
+    results = {}
+    for project in args.projects:
+        command = [
+            sys.executable, os.path.abspath(__file__), "--child", project,
+            "--levels", *map(str, args.levels),
+            "--requests", str(args.requests),
+            "--latency", str(args.latency),
+            "--output-tokens", str(args.output_tokens),
+        ]
+        # Keep benchmark side effects (response cache, route log, checkpoints) off disk
+        env = {**os.environ, "LLM_CACHE_MEMORY_ONLY": "1", "ROUTER_LOG_PATH": os.devnull, "CHECKPOINT_DB_PATH": ":memory:"}
+        completed = subprocess.run(command, env=env, stdout=subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            results[project] = {"error": f"exited with {completed.returncode}"}
+            continue
+        results[project] = json.loads(completed.stdout)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "levels": args.levels,
+            "requests": args.requests,
+            "latency": args.latency,
+            "output_tokens": args.output_tokens,
+        },
+        "results": results,
+    }
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    """Print per-graph changes between two result files; return 1 on regressions."""
+    with open(base_path) as f:
+        base = json.load(f)["results"]
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+
+    regressions = 0
+    for project, graphs in new.items():
+        for graph, levels in graphs.items():
+            if not isinstance(levels, dict):
+                continue
+            for level, metrics in levels.items():
+                old = base.get(project, {}).get(graph, {}).get(level)
+                if not old:
+                    continue
+                for key, higher_is_worse in (("p95_ms", True), ("p99_ms", True), ("throughput_rps", False), ("peak_memory_bytes", True)):
+                    if not old.get(key) or metrics.get(key) is None:
+                        continue
+                    change = (metrics[key] - old[key]) / old[key]
+                    worse = change > threshold if higher_is_worse else change < -threshold
+                    if worse:
+                        regressions += 1
+                    marker = "REGRESSION" if worse else ""
+                    print(f"{project}/{graph} c={level} {key}: {old[key]:.2f} -> {metrics[key]:.2f} ({change:+.1%}) {marker}")
+    print(f"\n{regressions} regression(s) above {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 100, 500], help="Concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Minimum requests per level")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake model latency in seconds")
+    parser.add_argument("--output-tokens", type=int, default=32, help="Fake model output tokens")
+    parser.add_argument("--projects", nargs="+", default=PROJECTS)
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change reported as a regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    if args.child:
+        json.dump(bench_project(args.child, args), sys.stdout)
+        return
+
+    report = run_all(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
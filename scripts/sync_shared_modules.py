@@ -0,0 +1,57 @@
+"""Keep the modules shared by the LangGraph projects identical.
+
+``models.py``, ``cache.py`` and ``instrumentation.py`` are copied into every
+LangGraph project rather than imported from one place: each project is a
+standalone uv project that ``langgraph dev``/``langgraph build`` package on
+their own (``"dependencies": ["."]``), so a module outside the project
+directory would not be deployed with it.
+
+The copies in ``03_workflow_and_agent/graph`` are the source of truth. Edit
+those, then run from the repository root::
+
+    python scripts/sync_shared_modules.py          # copy them to the other projects
+    python scripts/sync_shared_modules.py --check  # exit 1 if any copy has drifted
+"""
+import argparse
+import filecmp
+import os
+import shutil
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["models.py", "cache.py", "instrumentation.py"]
+
+SOURCE_DIR = "03_workflow_and_agent/graph"
+
+COPY_DIRS = [
+    "01_building_basic_chatbot_using_langgraph/graph",
+    "07_how_to_evaluate_agents/src",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="Only report copies that differ from the source")
+    args = parser.parse_args()
+
+    drifted = 0
+    for module in MODULES:
+        source = os.path.join(REPO_ROOT, SOURCE_DIR, module)
+        for copy_dir in COPY_DIRS:
+            copy = os.path.join(REPO_ROOT, copy_dir, module)
+            if os.path.exists(copy) and filecmp.cmp(source, copy, shallow=False):
+                continue
+            drifted += 1
+            if args.check:
+                print(f"{copy_dir}/{module} differs from {SOURCE_DIR}/{module}")
+            else:
+                shutil.copyfile(source, copy)
+                print(f"Updated {copy_dir}/{module}")
+
+    if args.check and drifted:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()